@@ -3,7 +3,7 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from dotenv import load_dotenv
 from flask_restx import Api
-from firebase_utils import initialize_firebase
+from firebase_utils import initialize_firebase, init_token_verifier
 from database import db
 import os
 
@@ -28,6 +28,7 @@ def create_app():
 
     # Initialize Firebase
     initialize_firebase(app)
+    init_token_verifier(app)
 
     # Initialize Flask-Restx API for Swagger documentation
     api = Api(app, version='1.0', title='AfriTrim API',
@@ -63,6 +64,15 @@ def create_app():
     api.add_namespace(auth_ns, path='/api/auth')
     api.add_namespace(user_ns, path='/api/users')
 
+    # Register CLI jobs, run from cron: flask close-appointments, flask repair-ratings,
+    # flask rebuild-sales-rollup
+    from services.closeout_service import close_out_command
+    from services.review_service import repair_ratings_command
+    from services.sale_services import rebuild_sales_rollup_command
+    app.cli.add_command(close_out_command)
+    app.cli.add_command(repair_ratings_command)
+    app.cli.add_command(rebuild_sales_rollup_command)
+
     # Add a basic route to check if the server is running
     @app.route('/')
     def index():
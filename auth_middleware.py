@@ -1,6 +1,83 @@
+import hashlib
+import time
 from functools import wraps
-from flask import request, jsonify
-from firebase_admin import auth
+from flask import request, g
+from config import Config
+from firebase_utils import verify_id_token
+from services.user_service import get_user_by_uid
+from utils.cache import TTLCache
+
+
+# Verified ID tokens, keyed by a hash of the raw token and shared by every decorator
+token_cache = TTLCache(maxsize=Config.TOKEN_CACHE_SIZE, ttl=Config.TOKEN_CACHE_TTL)
+
+
+def get_bearer_token():
+    """Extract the bearer token from the Authorization header."""
+    auth_header = request.headers.get('Authorization')
+    if auth_header is None:
+        raise ValueError("Missing Authorization header")
+
+    if not auth_header.startswith("Bearer "):
+        raise ValueError("Invalid Authorization header format")
+
+    return auth_header.split("Bearer ")[1]
+
+
+def decode_token(token):
+    """
+    Verify a Firebase ID token, reusing a previous verification when possible.
+
+    Cached entries never outlive the token's own ``exp`` claim.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    decoded_token = token_cache.get(key)
+    if decoded_token is not None:
+        return decoded_token
+
+    decoded_token = verify_id_token(token)
+    expires_in = decoded_token.get('exp', 0) - time.time()
+    token_cache.set(key, decoded_token, ttl=expires_in)
+    return decoded_token
+
+
+def get_token_cache_stats():
+    return token_cache.stats()
+
+
+def authenticate(token=None):
+    """
+    Decode the request's ID token at most once and keep the result on flask.g.
+
+    The token defaults to the bearer token of the Authorization header; routes
+    that receive it in the body (login, signup) pass it explicitly.
+    """
+    if token is None:
+        token = g.get('auth_token') or get_bearer_token()
+
+    if g.get('auth_token') != token:
+        decoded_token = decode_token(token)
+        g.auth_token = token
+        g.decoded_token = decoded_token
+        g.token_roles = {
+            'admin': decoded_token.get('admin', False),
+            'barber': decoded_token.get('barber', False),
+            'client': decoded_token.get('client', False)
+        }
+        g.pop('user', None)
+        g.pop('role', None)
+
+    return g.decoded_token
+
+
+def current_user():
+    """
+    Resolve the local user row and role for the authenticated token, once per request.
+    """
+    authenticate()
+    if 'user' not in g:
+        g.user, g.role = get_user_by_uid(g.decoded_token['uid'])
+    return g.user, g.role
 
 
 # Middleware function for general token verification
@@ -8,29 +85,11 @@ def verify_token(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            if auth_header is None:
-                return jsonify({"error": "Authentication failed", "message": "Missing Authorization header"}), 401
-
-            # Extract token from the Authorization header
-            if not auth_header.startswith("Bearer "):
-                return jsonify(
-                    {"error": "Authentication failed", "message": "Invalid Authorization header format"}), 401
-
-            token = auth_header.split("Bearer ")[1]
-            decoded_token = auth.verify_id_token(token)
-
-            # Check if decoded_token contains roles (custom claims)
-            decoded_token_roles = {
-                'admin': decoded_token.get('admin', False),
-                'barber': decoded_token.get('barber', False),
-                'client': decoded_token.get('client', False)
-            }
-
-            # Pass the decoded_token and its roles as arguments to the wrapped function
-            return func(decoded_token=decoded_token, decoded_token_roles=decoded_token_roles, *args, **kwargs)
+            # The decoded token and its roles are available on flask.g to the wrapped function
+            authenticate()
+            return func(*args, **kwargs)
         except Exception as e:
-            return jsonify({"error": "Authentication failed", "message": str(e)}), 401
+            return {"error": "Authentication failed", "message": str(e)}, 401
 
     return wrapper
 
@@ -40,16 +99,15 @@ def admin_required(func):
     """Decorator to restrict access to admin-only routes."""
     def wrapper(*args, **kwargs):
         try:
-            token = request.headers.get('Authorization').split("Bearer ")[1]
-            decoded_token = auth.verify_id_token(token)
+            authenticate()
 
             # Check custom claim for admin rights
-            if 'admin' in decoded_token and decoded_token['admin']:
+            if g.token_roles['admin']:
                 return func(*args, **kwargs)
             else:
-                return jsonify({"error": "Unauthorized access, admin required"}), 403
+                return {"error": "Unauthorized access, admin required"}, 403
         except Exception as e:
-            return jsonify({"error": "Authentication failed", "message": str(e)}), 401
+            return {"error": "Authentication failed", "message": str(e)}, 401
 
     wrapper.__name__ = func.__name__
     return wrapper
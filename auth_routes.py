@@ -1,5 +1,6 @@
+from flask import g
 from flask_restx import Namespace, Resource
-from auth_middleware import verify_token
+from auth_middleware import verify_token, admin_required, get_token_cache_stats
 
 # Define Namespace
 auth_ns = Namespace('auth', description='Authentication related operations')
@@ -9,16 +10,24 @@ auth_ns = Namespace('auth', description='Authentication related operations')
 class VerifyUser(Resource):
     @auth_ns.doc('verify_user', description="Endpoint to verify the user's token and provide role information.")
     @verify_token
-    def post(self, decoded_token, decoded_token_roles):
+    def post(self):
         try:
             # Extract relevant information from the decoded token
-            uid = decoded_token.get('uid')
+            uid = g.decoded_token.get('uid')
 
             # Prepare response data with user roles
             response_data = {
                 'uid': uid,
-                'roles': decoded_token_roles
+                'roles': g.token_roles
             }
             return response_data, 200
         except Exception as e:
             return {'error': 'Failed to verify token', 'message': str(e)}, 400
+
+
+@auth_ns.route('/token-cache')
+class TokenCacheStats(Resource):
+    @auth_ns.doc('token_cache_stats', description="Hit, miss and eviction counters for the verified-token cache.")
+    @admin_required
+    def get(self):
+        return get_token_cache_stats(), 200
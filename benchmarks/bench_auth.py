@@ -0,0 +1,151 @@
+"""
+Auth hot-path benchmark with locally signed RS256 tokens.
+
+Tokens are minted with a throwaway RSA key and verified offline by
+JwtTokenVerifier, so no Firebase project or network access is needed.
+Reports p50/p99 latency and requests/sec for verify_token, admin_required,
+both stacked, and POST /api/auth/verify, with a cold and a warm token cache
+and for a range of token-reuse ratios.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_auth --requests 2000 --reuse 0 0.5 0.9 1
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+PROJECT_ID = 'afritrim-bench'
+KEY_ID = 'bench-key'
+
+
+def make_signer():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+
+    def mint(uid, admin=True):
+        now = int(time.time())
+        claims = {
+            'iss': f'https://securetoken.google.com/{PROJECT_ID}',
+            'aud': PROJECT_ID,
+            'sub': uid,
+            'iat': now,
+            'exp': now + 3600,
+            'admin': admin,
+            'barber': False,
+            'client': not admin,
+        }
+        return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': KEY_ID})
+
+    return mint, {KEY_ID: public_pem}
+
+
+def build_app(public_keys):
+    import app as app_module
+    from firebase_utils import JwtTokenVerifier, KeySet, StaticKeySource, configure_token_verifier
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        app = app_module.create_app()
+    configure_token_verifier(JwtTokenVerifier(KeySet(StaticKeySource(public_keys)), PROJECT_ID))
+    return app
+
+
+def token_stream(mint, count, reuse_ratio, pool_size=32):
+    """Pre-mint tokens so signing cost stays out of the measurement."""
+    pool = [mint(f'user-{i}') for i in range(pool_size)]
+    fresh = iter([mint(f'fresh-{i}') for i in range(count)])
+    return [random.choice(pool) if random.random() < reuse_ratio else next(fresh) for _ in range(count)]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        'p50_ms': statistics.median(samples) * 1000,
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        'rps': len(samples) / total if total else 0.0,
+    }
+
+
+def bench_decorator(app, decorator, tokens, cold):
+    from auth_middleware import token_cache
+
+    handler = decorator(lambda: 'ok')
+    samples = []
+    for token in tokens:
+        if cold:
+            token_cache.clear()
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            start = time.perf_counter()
+            handler()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_endpoint(client, tokens, cold):
+    from auth_middleware import token_cache
+
+    samples = []
+    for token in tokens:
+        if cold:
+            token_cache.clear()
+        start = time.perf_counter()
+        response = client.post('/api/auth/verify', headers={'Authorization': f'Bearer {token}'})
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--reuse', type=float, nargs='+', default=[0.0, 0.5, 0.9, 1.0],
+                        help='fraction of requests that reuse an already-seen token')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    mint, public_keys = make_signer()
+    app = build_app(public_keys)
+    client = app.test_client()
+
+    from auth_middleware import admin_required, get_token_cache_stats, token_cache, verify_token
+
+    targets = {
+        'verify_token': lambda tokens, cold: bench_decorator(app, verify_token, tokens, cold),
+        'admin_required': lambda tokens, cold: bench_decorator(app, admin_required, tokens, cold),
+        'stacked': lambda tokens, cold: bench_decorator(
+            app, lambda f: admin_required(verify_token(f)), tokens, cold),
+        'POST /api/auth/verify': lambda tokens, cold: bench_endpoint(client, tokens, cold),
+    }
+
+    print(f"{'target':24s} {'cache':5s} {'reuse':>5s} {'p50 ms':>9s} {'p99 ms':>9s} {'req/s':>10s} {'hit ratio':>9s}")
+    for name, run in targets.items():
+        tokens = token_stream(mint, args.requests, 1.0)
+        result = summarize(run(tokens, cold=True))
+        print(f"{name:24s} {'cold':5s} {'-':>5s} {result['p50_ms']:9.3f} {result['p99_ms']:9.3f} "
+              f"{result['rps']:10.1f} {'-':>9s}")
+
+        for reuse in args.reuse:
+            tokens = token_stream(mint, args.requests, reuse)
+            token_cache.clear()
+            token_cache.reset_stats()
+            result = summarize(run(tokens, cold=False))
+            hit_ratio = get_token_cache_stats()['hit_ratio']
+            print(f"{name:24s} {'warm':5s} {reuse:5.2f} {result['p50_ms']:9.3f} {result['p99_ms']:9.3f} "
+                  f"{result['rps']:10.1f} {hit_ratio:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Custom-claims sync throughput against the offline fake Firebase backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_claims_sync --users 500 --updates 3 --latency 0.02
+"""
+import argparse
+import time
+
+from claims_sync import ClaimsSync, FakeClaimsBackend, claims_for_role
+
+ROLES = ["client", "barber", "admin"]
+
+
+def run_inline(users, updates, latency):
+    backend = FakeClaimsBackend(latency=latency)
+    start = time.perf_counter()
+    for i in range(updates):
+        for u in range(users):
+            backend.set_claims(f"user-{u}", claims_for_role(ROLES[i % len(ROLES)]))
+    return time.perf_counter() - start, backend.calls, None
+
+
+def run_sync(users, updates, latency, workers, failure_rate):
+    backend = FakeClaimsBackend(latency=latency, failure_rate=failure_rate)
+    sync = ClaimsSync(backend, workers=workers, base_delay=0.01, max_delay=0.1)
+    start = time.perf_counter()
+    enqueue_time = 0.0
+    for i in range(updates):
+        for u in range(users):
+            t = time.perf_counter()
+            sync.enqueue(f"user-{u}", claims_for_role(ROLES[i % len(ROLES)]))
+            enqueue_time += time.perf_counter() - t
+    sync.flush()
+    elapsed = time.perf_counter() - start
+    sync.stop()
+
+    expected = claims_for_role(ROLES[(updates - 1) % len(ROLES)])
+    wrong = sum(1 for u in range(users) if backend.claims.get(f"user-{u}") != expected)
+    stats = sync.stats()
+    stats['mean_enqueue_us'] = enqueue_time / (users * updates) * 1e6
+    stats['wrong_final_claims'] = wrong
+    return elapsed, backend.calls, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=3, help='claim updates per user')
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated Firebase round-trip in seconds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    total = args.users * args.updates
+    elapsed, calls, _ = run_inline(args.users, args.updates, args.latency)
+    print(f"inline            {total / elapsed:10.1f} updates/s  {calls:6d} backend calls  {elapsed:7.2f}s")
+
+    for workers in args.workers:
+        elapsed, calls, stats = run_sync(args.users, args.updates, args.latency, workers, args.failure_rate)
+        print(f"sync workers={workers:<3d}  {total / elapsed:10.1f} updates/s  {calls:6d} backend calls  "
+              f"{elapsed:7.2f}s  {stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput of the end-of-day appointment close-out job.
+
+Seeds an in-memory SQLite database with --rows past 'Scheduled'
+appointments, a third of which have a same-day sale, then runs
+close_out_appointments() once per --batch-sizes value on a fresh copy and
+reports rows/s. It checks that every row was closed and that the
+Completed / No-show split matches the seeded sales.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_closeout --rows 50000 --batch-sizes 100,1000,5000
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+FIRST_DAY = datetime(2024, 1, 1, 9, 0)
+
+
+def build_app():
+    import app as app_module
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        return app_module.create_app()
+
+
+def seed(db, rows, clients=500, barbers=20):
+    from models import Appointment, Barber, Barbershop, Client, Sale, Service
+
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    db.session.execute(Barbershop.__table__.insert(), [{'id': 1, 'name': 'Shop', 'admin_id': 'admin-1',
+                                                        'created_at': now, 'updated_at': now}])
+    db.session.execute(Client.__table__.insert(), [
+        {'id': i, 'uid': f'client-{i}', 'name': f'Client {i}', 'email': f'client{i}@example.com',
+         'created_at': now, 'updated_at': now} for i in range(1, clients + 1)
+    ])
+    db.session.execute(Service.__table__.insert(), [{'id': 1, 'name': 'Cut', 'price': 10, 'barbershop_id': 1,
+                                                     'created_at': now, 'updated_at': now}])
+    db.session.execute(Barber.__table__.insert(), [
+        {'id': i, 'uid': f'barber-{i}', 'name': f'Barber {i}', 'barbershop_id': 1, 'available': True,
+         'created_at': now, 'updated_at': now} for i in range(1, barbers + 1)
+    ])
+    appointments, sales = [], []
+    for n in range(rows):
+        start = FIRST_DAY + timedelta(days=n // (barbers * 8), minutes=60 * (n % 8))
+        client_id = 1 + n % clients
+        appointments.append({'client_id': client_id, 'barber_id': 1 + n % barbers, 'service_id': 1,
+                             'appointment_time': start, 'duration': 45, 'end_time': start + timedelta(minutes=45),
+                             'status': 'Scheduled', 'created_at': now, 'updated_at': now})
+        if n % 3 == 0:
+            sales.append({'client_id': client_id, 'barbershop_id': 1, 'amount': 10, 'expense': 4, 'profit': 6,
+                          'created_at': start + timedelta(hours=1), 'updated_at': now})
+    db.session.execute(Appointment.__table__.insert(), appointments)
+    db.session.execute(Sale.__table__.insert(), sales)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--batch-sizes', default='100,1000,5000')
+    args = parser.parse_args()
+
+    app = build_app()
+    from app import db
+    from sqlalchemy import func, select
+    from models import Appointment
+    from services.closeout_service import close_out_appointments
+
+    print(f"{'batch':>7s} {'batches':>8s} {'completed':>10s} {'no-show':>8s} {'seconds':>8s} {'rows/s':>9s}")
+    with app.app_context():
+        for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+            seed(db, args.rows)
+            totals = close_out_appointments(cutoff=datetime.now(), batch_size=batch_size)
+            left = db.session.execute(
+                select(func.count()).where(Appointment.status == 'Scheduled')
+            ).scalar()
+            assert left == 0 and totals['rows'] == args.rows, (left, totals)
+            assert totals['completed'] == (args.rows + 2) // 3, totals
+            print(f"{batch_size:7d} {totals['batches']:8d} {totals['completed']:10d} {totals['no_show']:8d} "
+                  f"{totals['seconds']:8.2f} {totals['rows_per_second']:9.0f}")
+
+
+if __name__ == '__main__':
+    main()
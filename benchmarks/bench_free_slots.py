@@ -0,0 +1,98 @@
+"""
+Latency of the free-slot finder for a whole barbershop.
+
+Seeds an in-memory SQLite database with one shop of --barbers barbers,
+each booked --per-day times a day, then times
+GET /api/barbershop/1/free-slots through the Flask test client for
+week and month views. It also counts the SQL statements per request,
+which should be 1 whatever the shop size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_free_slots --barbers 20 --per-day 8
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import event
+
+FIRST_DAY = date(2030, 1, 7)
+
+
+def build_app():
+    import app as app_module
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        return app_module.create_app()
+
+
+def seed(db, barbers, per_day, days):
+    from models import Appointment, Barber, Barbershop, Client, Service
+
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    db.session.execute(Barbershop.__table__.insert(), [{'id': 1, 'name': 'Shop', 'admin_id': 'admin-1',
+                                                        'created_at': now, 'updated_at': now}])
+    db.session.execute(Client.__table__.insert(), [{'id': 1, 'uid': 'client-1', 'name': 'Client',
+                                                    'email': 'client@example.com', 'created_at': now,
+                                                    'updated_at': now}])
+    db.session.execute(Service.__table__.insert(), [{'id': 1, 'name': 'Cut', 'price': 10, 'barbershop_id': 1,
+                                                     'created_at': now, 'updated_at': now}])
+    db.session.execute(Barber.__table__.insert(), [
+        {'id': i, 'uid': f'barber-{i}', 'name': f'Barber {i}', 'barbershop_id': 1, 'available': True,
+         'created_at': now, 'updated_at': now} for i in range(1, barbers + 1)
+    ])
+    rows = []
+    for barber_id in range(1, barbers + 1):
+        for day in range(days):
+            opening = datetime.combine(FIRST_DAY + timedelta(days=day), datetime.min.time()) + timedelta(hours=9)
+            for n in range(per_day):
+                start = opening + timedelta(minutes=60 * n + 15 * (barber_id % 2))
+                rows.append({'client_id': 1, 'barber_id': barber_id, 'service_id': 1, 'appointment_time': start,
+                             'duration': 45, 'end_time': start + timedelta(minutes=45), 'status': 'Scheduled',
+                             'created_at': now, 'updated_at': now})
+    db.session.execute(Appointment.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--barbers', type=int, default=20)
+    parser.add_argument('--per-day', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = build_app()
+    from app import db
+
+    with app.app_context():
+        appointments = seed(db, args.barbers, args.per_day, 31)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+    client = app.test_client()
+    print(f"{args.barbers} barbers, {appointments} appointments")
+    print(f"{'view':8s} {'queries':>8s} {'best ms':>9s} {'mean ms':>9s} {'slots':>7s}")
+    for label, days in (('day', 1), ('week', 7), ('month', 31)):
+        url = (f'/api/barbershop/1/free-slots?from={FIRST_DAY.isoformat()}'
+               f'&to={(FIRST_DAY + timedelta(days=days - 1)).isoformat()}')
+        timings = []
+        for _ in range(args.repeat):
+            statements.clear()
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - start)
+        slots = sum(len(barber['slots']) for barber in response.get_json()['barbers'])
+        print(f"{label:8s} {len(statements):8d} {min(timings) * 1000:9.2f} "
+              f"{sum(timings) / len(timings) * 1000:9.2f} {slots:7d}")
+
+
+if __name__ == '__main__':
+    main()
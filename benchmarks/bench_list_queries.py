@@ -0,0 +1,117 @@
+"""
+SQL statements issued per list endpoint as the tables grow.
+
+Seeds an in-memory SQLite database at several sizes, calls each list
+endpoint through the Flask test client and counts the statements it
+executes. With the ColumnSpecs and services/loader_profiles.py the
+count has to stay flat; the script exits non-zero if it grows with the
+number of rows. tests/test_list_queries.py runs the same check under
+pytest.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_list_queries --sizes 5 50 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import event
+
+ENDPOINTS = [
+    '/api/barbershop/',
+    '/api/barbershop/?fields=id,name,photo_url',
+    '/api/barbershop/1',
+    '/api/barbershop/1/barbers',
+    '/api/barbershop/1/services',
+    '/api/barbershop/search?query=Shop',
+    '/api/barber/',
+    '/api/barber/?fields=id,name,photo_url',
+    '/api/barber/barbershop/1',
+    '/api/appointment/',
+    '/api/appointment/barber/1',
+    '/api/appointment/client/1',
+    '/api/appointment/barber/1/upcoming',
+    '/api/invoice/',
+    '/api/invoice/client/1',
+    '/api/invoice/barbershop/1',
+]
+
+
+def build_app():
+    import app as app_module
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        return app_module.create_app()
+
+
+def seed(db, size):
+    from models import Appointment, Barber, Barbershop, Client, Invoice, Review, Service
+
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    shop = Barbershop(name='Shop 1', admin_id='admin-1', location='Nairobi')
+    client = Client(uid='client-1', name='Client 1', email='client1@example.com')
+    db.session.add_all([shop, client])
+    db.session.flush()
+
+    clients = [client] + [
+        Client(uid=f'client-{i}', name=f'Client {i}', email=f'client{i}@example.com') for i in range(2, size + 1)
+    ]
+    barbers = [Barber(uid=f'barber-{i}', name=f'Barber {i}', barbershop_id=shop.id) for i in range(size)]
+    services = [Service(name=f'Service {i}', price=10 + i, barbershop_id=shop.id) for i in range(size)]
+    db.session.add_all(clients[1:] + barbers + services)
+    db.session.flush()
+
+    for i in range(size):
+        db.session.add(Review(rating=1 + i % 5, comment='ok', barber_id=barbers[i].id))
+        db.session.add(Appointment(client_id=clients[i].id, barber_id=barbers[0].id, service_id=services[0].id,
+                                   appointment_time=now + timedelta(hours=i + 1), duration=30))
+        db.session.add(Appointment(client_id=client.id, barber_id=barbers[i].id, service_id=services[0].id,
+                                   appointment_time=now + timedelta(days=1, hours=i), duration=30))
+        db.session.add(Invoice(client_id=clients[i].id, barbershop_id=shop.id, amount=20.0))
+        db.session.add(Invoice(client_id=client.id, barbershop_id=shop.id, amount=30.0))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 50, 200])
+    args = parser.parse_args()
+
+    app = build_app()
+    from app import db
+
+    counts = {}
+    with app.app_context():
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+        for size in args.sizes:
+            seed(db, size)
+            db.session.remove()
+            for endpoint in ENDPOINTS:
+                statements.clear()
+                start = time.perf_counter()
+                response = app.test_client().get(endpoint)
+                elapsed = time.perf_counter() - start
+                counts.setdefault(endpoint, []).append((len(statements), elapsed, response.status_code))
+
+    header = ''.join(f'{f"rows={size}":>22s}' for size in args.sizes)
+    print(f"{'endpoint':40s}{header}")
+    failed = False
+    for endpoint, results in counts.items():
+        cells = ''.join(f'{n:6d} q {t * 1000:8.2f} ms {status:3d}' for n, t, status in results)
+        flat = len({n for n, _, _ in results}) == 1
+        failed = failed or not flat
+        print(f"{endpoint:40s}{cells}{'' if flat else '   <-- grows with rows'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
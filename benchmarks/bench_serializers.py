@@ -0,0 +1,116 @@
+"""
+ORM + to_dict() versus column-row serialization for the big list endpoints.
+
+Seeds an in-memory SQLite database and times, per table, loading the ORM
+objects and calling to_dict() against selecting the columns as Core rows
+through the ColumnSpec used by the services. Both paths end in json.dumps.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serializers --rows 1000 10000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+
+def build_app():
+    import app as app_module
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        return app_module.create_app()
+
+
+def seed(db, rows):
+    from models import Appointment, Barber, Barbershop, Client, Invoice, Payment, Review, Sale, Service
+
+    db.drop_all()
+    db.create_all()
+    now = datetime.now()
+    clients = [{'id': i, 'uid': f'client-{i}', 'name': f'Client {i}', 'email': f'client{i}@example.com',
+                'created_at': now, 'updated_at': now} for i in range(1, 101)]
+    db.session.execute(Barbershop.__table__.insert(), [{'id': 1, 'name': 'Shop', 'admin_id': 'admin-1',
+                                                        'created_at': now, 'updated_at': now}])
+    db.session.execute(Client.__table__.insert(), clients)
+    db.session.execute(Barber.__table__.insert(), [{'id': 1, 'uid': 'barber-1', 'name': 'Barber',
+                                                    'barbershop_id': 1, 'created_at': now, 'updated_at': now}])
+    db.session.execute(Service.__table__.insert(), [{'id': 1, 'name': 'Cut', 'price': 10, 'barbershop_id': 1,
+                                                     'created_at': now, 'updated_at': now}])
+    db.session.execute(Appointment.__table__.insert(), [
+        {'client_id': 1 + i % 100, 'barber_id': 1, 'service_id': 1, 'duration': 30, 'status': 'Scheduled',
+         'appointment_time': now + timedelta(minutes=30 * i), 'created_at': now, 'updated_at': now}
+        for i in range(rows)
+    ])
+    db.session.execute(Invoice.__table__.insert(), [
+        {'client_id': 1 + i % 100, 'barbershop_id': 1, 'amount': 25.0, 'status': 'Pending',
+         'created_at': now, 'updated_at': now} for i in range(rows)
+    ])
+    db.session.execute(Sale.__table__.insert(), [
+        {'client_id': 1 + i % 100, 'barbershop_id': 1, 'amount': 25.0, 'expense': 5.0, 'profit': 20.0,
+         'created_at': now, 'updated_at': now} for i in range(rows)
+    ])
+    db.session.execute(Payment.__table__.insert(), [
+        {'admin_id': 'admin-1', 'amount': 25, 'status': 'Paid', 'paid_at': now, 'updated_at': now}
+        for _ in range(rows)
+    ])
+    db.session.execute(Review.__table__.insert(), [
+        {'rating': 1 + i % 5, 'comment': 'Great cut', 'barber_id': 1, 'created_at': now, 'updated_at': now}
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        from app import db
+        db.session.expunge_all()
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = build_app()
+    from app import db
+    from sqlalchemy.orm import joinedload
+    from models import Appointment, Invoice, Payment, Review, Sale
+    from services.appointment_services import APPOINTMENT_COLUMNS
+    from services.invoice_service import INVOICE_COLUMNS
+    from services.payment_service import PAYMENT_COLUMNS
+    from services.review_service import REVIEW_COLUMNS
+    from services.sale_services import SALE_COLUMNS
+
+    # The ORM side eager-loads client, which Appointment.to_dict and Invoice.to_dict read
+    cases = [
+        ('appointments', lambda: Appointment.query.options(joinedload(Appointment.client)).all(), APPOINTMENT_COLUMNS),
+        ('invoices', lambda: Invoice.query.options(joinedload(Invoice.client)).all(), INVOICE_COLUMNS),
+        ('sales', lambda: Sale.query.all(), SALE_COLUMNS),
+        ('payments', lambda: Payment.query.all(), PAYMENT_COLUMNS),
+        ('reviews', lambda: Review.query.all(), REVIEW_COLUMNS),
+    ]
+
+    with app.app_context():
+        print(f"{'table':14s} {'rows':>7s} {'orm ms':>10s} {'columnar ms':>12s} {'speedup':>8s}")
+        for rows in args.rows:
+            seed(db, rows)
+            for name, load, spec in cases:
+                orm, orm_size = timed(
+                    lambda: json.dumps([obj.to_dict() for obj in load()], default=str), args.repeat)
+                columnar, columnar_size = timed(lambda: json.dumps(spec.fetch()), args.repeat)
+                print(f"{name:14s} {rows:7d} {orm * 1000:10.1f} {columnar * 1000:12.1f} {orm / columnar:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Concurrent booking stress test: several processes book the same barbers.
+
+Seeds a database, then starts --workers processes that each fire
+--attempts bookings at random (barber, slot) pairs, with random 30 or 60
+minute durations on a 30 minute grid so attempts overlap a lot. Every
+process has its own app and connection pool, like gunicorn workers.
+Afterwards the script looks for any two active appointments of the same
+barber that overlap, and exits non-zero if it finds one.
+
+By default it uses a temporary SQLite file. Set DATABASE_URL to a
+PostgreSQL database to exercise the row-lock path. The database is wiped
+and re-seeded. --unsafe turns the per-barber lock off to show that the
+check alone races.
+
+Run from the repository root:
+
+    python -m benchmarks.stress_booking --workers 8 --attempts 200 --barbers 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+SLOTS = 16
+START = datetime(2030, 1, 7, 9, 0)
+
+
+def build_app():
+    import app as app_module
+
+    with mock.patch.object(app_module, 'initialize_firebase'):
+        return app_module.create_app()
+
+
+def seed(db, barbers):
+    from models import Barber, Barbershop, Client, Service
+
+    db.drop_all()
+    db.create_all()
+    shop = Barbershop(name='Shop', admin_id='admin-1')
+    db.session.add(shop)
+    db.session.flush()
+    db.session.add(Client(uid='client-1', name='Client', email='client@example.com'))
+    db.session.add(Service(name='Cut', price=10, barbershop_id=shop.id))
+    db.session.add_all([Barber(uid=f'barber-{i}', name=f'Barber {i}', barbershop_id=shop.id)
+                        for i in range(barbers)])
+    db.session.commit()
+
+
+def worker(seed_value, attempts, barbers, unsafe, results):
+    random.seed(seed_value)
+    app = build_app()
+    if unsafe:
+        mock.patch('services.appointment_services.lock_barber_schedule').start()
+    client = app.test_client()
+    counts = {}
+    for _ in range(attempts):
+        start = START + timedelta(minutes=30 * random.randrange(SLOTS))
+        response = client.post('/api/appointment/', json={
+            'client_id': 1,
+            'barber_id': random.randint(1, barbers),
+            'service_id': 1,
+            'appointment_time': start.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            'duration': random.choice([30, 60]),
+        })
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+    results.put(counts)
+
+
+def count_double_bookings(db):
+    from sqlalchemy import and_, func, select
+    from sqlalchemy.orm import aliased
+    from models import Appointment
+
+    a, b = aliased(Appointment), aliased(Appointment)
+    return db.session.execute(select(func.count()).select_from(a).join(b, and_(
+        a.barber_id == b.barber_id,
+        a.id < b.id,
+        a.appointment_time < b.end_time,
+        b.appointment_time < a.end_time,
+        a.status != 'Cancelled',
+        b.status != 'Cancelled',
+    ))).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=200)
+    parser.add_argument('--barbers', type=int, default=4)
+    parser.add_argument('--unsafe', action='store_true', help='disable the per-barber lock')
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), 'stress.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}?timeout=60'
+
+    app = build_app()
+    from app import db
+    with app.app_context():
+        seed(db, args.barbers)
+        db.engine.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(i, args.attempts, args.barbers, args.unsafe, results))
+        for i in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    totals = {}
+    for _ in processes:
+        for status, count in results.get().items():
+            totals[status] = totals.get(status, 0) + count
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        doubles = count_double_bookings(db)
+
+    attempts = sum(totals.values())
+    print(f"{attempts} attempts by {args.workers} processes in {elapsed:.2f}s ({attempts / elapsed:.0f}/s)")
+    print(f"booked (201): {totals.get(201, 0)}  rejected (409): {totals.get(409, 0)}  "
+          f"other: { {k: v for k, v in totals.items() if k not in (201, 409)} }")
+    print(f"overlapping appointment pairs: {doubles}")
+    sys.exit(1 if doubles else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import atexit
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from firebase_admin import auth
+from config import Config
+from utils.threads import ThreadStarter
+
+# Custom claims assigned to each role
+ROLE_CLAIMS = {
+    "admin": {"admin": True, "barber": False, "client": False},
+    "barber": {"admin": False, "barber": True, "client": False},
+    "client": {"admin": False, "barber": False, "client": True},
+}
+
+
+def claims_for_role(role):
+    if role not in ROLE_CLAIMS:
+        raise ValueError("Invalid role provided")
+    return dict(ROLE_CLAIMS[role])
+
+
+class FirebaseClaimsBackend:
+    """Write custom claims through the Firebase Admin SDK."""
+
+    def set_claims(self, uid, claims):
+        auth.set_custom_user_claims(uid, claims)
+
+
+class FakeClaimsBackend:
+    """
+    In-memory stand-in for Firebase, with configurable latency and failure
+    rate, so the sync pipeline can be exercised and benchmarked offline.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.claims = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def set_claims(self, uid, claims):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.failure_rate and random.random() < self.failure_rate:
+                raise RuntimeError(f"Simulated failure setting claims for {uid}")
+            self.claims[uid] = dict(claims)
+
+
+class ClaimsSync:
+    """
+    Background writer for Firebase custom claims.
+
+    Pending updates are keyed by UID, so a newer update replaces one that
+    has not been sent yet. A pool of worker threads sends them, never two
+    at once for the same UID, and retries failures with exponential backoff.
+    """
+
+    def __init__(self, backend, workers=4, max_retries=5, base_delay=0.5, max_delay=30.0):
+        self.backend = backend
+        self.workers = workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (ready_at, seq, uid)
+        self._seq = itertools.count()
+        self._pending = {}  # uid -> (claims, attempts)
+        self._inflight = set()
+        self._threads = []
+        self._starter = ThreadStarter()
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+
+    def enqueue(self, uid, claims):
+        self._starter.ensure(self._start)
+        with self._cond:
+            if uid in self._pending:
+                self.coalesced += 1
+            self._pending[uid] = (dict(claims), 0)
+            heapq.heappush(self._queue, (time.monotonic(), next(self._seq), uid))
+            self._cond.notify()
+
+    def flush(self, timeout=None):
+        """Wait until every pending update has been sent or given up on."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def stop(self, timeout=5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._starter.reset()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'inflight': len(self._inflight),
+                'sent': self.sent,
+                'failed': self.failed,
+                'retried': self.retried,
+                'coalesced': self.coalesced
+            }
+
+    def _start(self):
+        with self._cond:
+            self._stopping = False
+            self._threads = [
+                threading.Thread(target=self._run, name=f'claims-sync-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                now = time.monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    _, _, uid = heapq.heappop(self._queue)
+                    # Stale entry, or the UID is being sent right now and will be requeued after
+                    if uid not in self._pending or uid in self._inflight:
+                        continue
+                    claims, attempts = self._pending.pop(uid)
+                    self._inflight.add(uid)
+                    return uid, claims, attempts
+                self._cond.wait(self._queue[0][0] - now if self._queue else None)
+
+    def _finish(self, uid, claims, attempts, error):
+        with self._cond:
+            self._inflight.discard(uid)
+            now = time.monotonic()
+            if uid in self._pending:
+                # A newer update arrived while this one was in flight
+                heapq.heappush(self._queue, (now, next(self._seq), uid))
+            elif error is None:
+                self.sent += 1
+            elif attempts < self.max_retries:
+                self.retried += 1
+                delay = min(self.base_delay * 2 ** attempts, self.max_delay)
+                self._pending[uid] = (claims, attempts + 1)
+                heapq.heappush(self._queue, (now + delay, next(self._seq), uid))
+            else:
+                self.failed += 1
+                logging.error(f"Giving up setting custom claims {claims} for user {uid}: {error}")
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            uid, claims, attempts = job
+            error = None
+            try:
+                self.backend.set_claims(uid, claims)
+            except Exception as e:
+                error = e
+            self._finish(uid, claims, attempts, error)
+
+
+_claims_sync = None
+_lock = threading.Lock()
+
+
+def get_claims_sync():
+    global _claims_sync
+    if _claims_sync is None:
+        with _lock:
+            if _claims_sync is None:
+                backend = FakeClaimsBackend() if Config.CLAIMS_SYNC_BACKEND == 'fake' else FirebaseClaimsBackend()
+                claims_sync = ClaimsSync(backend, workers=Config.CLAIMS_SYNC_WORKERS,
+                                         max_retries=Config.CLAIMS_SYNC_MAX_RETRIES)
+                atexit.register(claims_sync.stop)
+                _claims_sync = claims_sync
+    return _claims_sync
+
+
+def enqueue_claims(uid, claims):
+    """Queue a custom-claims update for a Firebase user without waiting on Firebase."""
+    get_claims_sync().enqueue(uid, claims)
@@ -4,3 +4,85 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///inventory.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Verified ID-token cache shared by the auth decorators
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 300))
+
+    # ID-token verification: "firebase" (Admin SDK) or "jwt" (PyJWT with locally cached keys)
+    AUTH_VERIFIER = os.getenv('AUTH_VERIFIER', 'firebase')
+    AUTH_KEYS_URL = os.getenv('AUTH_KEYS_URL')
+    AUTH_KEYS_FILE = os.getenv('AUTH_KEYS_FILE')
+    FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
+
+    # UID -> role lookups done by get_user_by_uid
+    USER_ROLE_CACHE_SIZE = int(os.getenv('USER_ROLE_CACHE_SIZE', 10000))
+    USER_ROLE_CACHE_TTL = int(os.getenv('USER_ROLE_CACHE_TTL', 60))
+
+    # Background Firebase custom-claims writer: "firebase" or "fake" (offline, in-memory)
+    CLAIMS_SYNC_BACKEND = os.getenv('CLAIMS_SYNC_BACKEND', 'firebase')
+    CLAIMS_SYNC_WORKERS = int(os.getenv('CLAIMS_SYNC_WORKERS', 4))
+    CLAIMS_SYNC_MAX_RETRIES = int(os.getenv('CLAIMS_SYNC_MAX_RETRIES', 5))
+
+    # Rows fetched per round-trip when a list endpoint streams its response (?stream=true)
+    STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 1000))
+
+    # Keyset pagination (?limit=&cursor=) on collection endpoints
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+
+    # The response, rating and analytics caches below live in each worker
+    # process and are invalidated when that process commits a change; where
+    # set, their TTLs bound staleness from writes made by other worker processes.
+
+    # Public catalog responses, dropped whenever a catalog row is committed
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1000))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+
+    # Most recent reviews embedded in each barber payload; the rest are paginated
+    EMBEDDED_REVIEWS = int(os.getenv('EMBEDDED_REVIEWS', 3))
+
+    # Per-barbershop rating summaries (GET /api/review/ratings?barbershop_id=),
+    # dropped when one of the shop's reviews or barbers changes
+    RATING_CACHE_SIZE = int(os.getenv('RATING_CACHE_SIZE', 1000))
+    RATING_CACHE_TTL = int(os.getenv('RATING_CACHE_TTL', 300))
+
+    # Closed (past) buckets of GET /api/sale/analytics, dropped when a sale on
+    # one of their days changes. They never expire unless a TTL (seconds) is
+    # set, which multi-worker deployments that edit past sales should do
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', 50000))
+    ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', 0))
+    ANALYTICS_MAX_BUCKETS = int(os.getenv('ANALYTICS_MAX_BUCKETS', 400))
+
+    # Appointment lengths in minutes. The maximum also bounds the index range
+    # scanned by the booking conflict check.
+    DEFAULT_APPOINTMENT_DURATION = int(os.getenv('DEFAULT_APPOINTMENT_DURATION', 30))
+    MAX_APPOINTMENT_DURATION = int(os.getenv('MAX_APPOINTMENT_DURATION', 480))
+    # Largest POST /api/appointment/batch
+    MAX_BATCH_APPOINTMENTS = int(os.getenv('MAX_BATCH_APPOINTMENTS', 100))
+
+    # End-of-day close-out (flask close-appointments): rows per UPDATE and
+    # commit, and how long after an appointment ends it is left alone
+    CLOSEOUT_BATCH_SIZE = int(os.getenv('CLOSEOUT_BATCH_SIZE', 1000))
+    CLOSEOUT_GRACE_MINUTES = int(os.getenv('CLOSEOUT_GRACE_MINUTES', 60))
+
+    # Appointment change feed (server-sent events). "local" keeps events in
+    # the worker that made the change; "sqlite" shares them between workers
+    # through a change-log file that every worker polls.
+    EVENTS_TRANSPORT = os.getenv('EVENTS_TRANSPORT', 'local')
+    EVENTS_LOG_PATH = os.getenv('EVENTS_LOG_PATH', 'appointment_events.db')
+    EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', 0.5))
+    EVENTS_LOG_RETENTION = int(os.getenv('EVENTS_LOG_RETENTION', 3600))
+    # Per-stream queue, events kept for Last-Event-ID replay, and SSE timings
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_BACKLOG = int(os.getenv('EVENTS_BACKLOG', 1000))
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', 3000))
+
+    # Bookable hours used by the free-slot finder: a daily HH:MM window on the
+    # listed weekdays (0 = Monday), cut into SLOT_MINUTES steps
+    OPENING_TIME = os.getenv('OPENING_TIME', '09:00')
+    CLOSING_TIME = os.getenv('CLOSING_TIME', '18:00')
+    OPEN_WEEKDAYS = [int(day) for day in os.getenv('OPEN_WEEKDAYS', '0,1,2,3,4,5').split(',')]
+    SLOT_MINUTES = int(os.getenv('SLOT_MINUTES', 30))
+    MAX_AVAILABILITY_DAYS = int(os.getenv('MAX_AVAILABILITY_DAYS', 31))
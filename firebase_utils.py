@@ -1,6 +1,19 @@
+import json
+import logging
 import os
+import re
+import threading
+import time
 import firebase_admin
+import jwt
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
 from firebase_admin import credentials, storage, auth
+from utils.threads import ThreadStarter
+
+# Public certificates Firebase signs ID tokens with
+FIREBASE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
 
 def initialize_firebase(app):
     # Check if we are in a development or production environment
@@ -58,3 +71,175 @@ def set_custom_claims(user_uid, claims):
         print(f"Custom claims {claims} set for user {user_uid}")
     except Exception as e:
         print(f"Error setting custom claims for user {user_uid}: {e}")
+
+
+# Key sources for offline ID-token verification. Each returns ({kid: PEM}, max_age_seconds).
+class HttpKeySource:
+    """Fetch signing certificates from an HTTP endpoint (Google's, or a stand-in key server)."""
+
+    def __init__(self, url=FIREBASE_CERTS_URL, timeout=5, default_max_age=3600):
+        self.url = url
+        self.timeout = timeout
+        self.default_max_age = default_max_age
+
+    def fetch(self):
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else self.default_max_age
+        return response.json(), max_age
+
+
+class FileKeySource:
+    """Read signing certificates or public keys from a local JSON file of {kid: PEM}."""
+
+    def __init__(self, path, max_age=3600):
+        self.path = path
+        self.max_age = max_age
+
+    def fetch(self):
+        with open(self.path) as f:
+            return json.load(f), self.max_age
+
+
+class StaticKeySource:
+    """Serve a fixed in-memory key set, e.g. keys generated by a benchmark."""
+
+    def __init__(self, keys, max_age=3600):
+        self.keys = keys
+        self.max_age = max_age
+
+    def fetch(self):
+        return dict(self.keys), self.max_age
+
+
+def load_public_key(pem):
+    if isinstance(pem, str):
+        pem = pem.encode('utf-8')
+    if b'BEGIN CERTIFICATE' in pem:
+        return x509.load_pem_x509_certificate(pem).public_key()
+    return serialization.load_pem_public_key(pem)
+
+
+class KeySet:
+    """
+    Locally cached public key set, refreshed by a background thread shortly
+    before the source's max-age runs out.
+    """
+
+    def __init__(self, source, refresh_margin=300, retry_interval=30, min_refresh_interval=60):
+        self.source = source
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._expires_at = 0
+        self._last_refresh = 0
+        self._lock = threading.Lock()
+        self._starter = ThreadStarter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        pems, max_age = self.source.fetch()
+        keys = {kid: load_public_key(pem) for kid, pem in pems.items()}
+        with self._lock:
+            self._keys = keys
+            self._last_refresh = time.time()
+            self._expires_at = self._last_refresh + max_age
+        return keys
+
+    def get(self, kid):
+        self._starter.ensure(self.start)
+        key = self._keys.get(kid)
+        if key is None and time.time() - self._last_refresh >= self.min_refresh_interval:
+            # Unknown kid: the keys may have rotated ahead of the scheduled refresh
+            key = self.refresh().get(kid)
+        if key is None:
+            raise ValueError(f"No public key found for key id {kid}")
+        return key
+
+    def start(self):
+        if not self._keys:
+            self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='id-token-keyset-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _next_refresh_delay(self):
+        return max(self._expires_at - self.refresh_margin - time.time(), self.min_refresh_interval)
+
+    def _run(self):
+        delay = self._next_refresh_delay()
+        while not self._stop.wait(delay):
+            try:
+                self.refresh()
+                delay = self._next_refresh_delay()
+            except Exception as e:
+                logging.error(f"Failed to refresh ID-token keys: {e}")
+                delay = self.retry_interval
+
+
+class JwtTokenVerifier:
+    """Verify Firebase ID tokens with PyJWT against a locally cached KeySet."""
+
+    def __init__(self, key_set, project_id, leeway=0):
+        self.key_set = key_set
+        self.project_id = project_id
+        self.issuer = f'https://securetoken.google.com/{project_id}'
+        self.leeway = leeway
+
+    def verify(self, token):
+        header = jwt.get_unverified_header(token)
+        if header.get('alg') != 'RS256':
+            raise jwt.InvalidTokenError("ID token must be signed with RS256")
+        key = self.key_set.get(header.get('kid'))
+        decoded_token = jwt.decode(
+            token,
+            key,
+            algorithms=['RS256'],
+            audience=self.project_id,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']}
+        )
+        if not decoded_token['sub'] or len(decoded_token['sub']) > 128:
+            raise jwt.InvalidTokenError("ID token has an invalid subject")
+        decoded_token['uid'] = decoded_token['sub']
+        return decoded_token
+
+
+# Verifier used by verify_id_token; None means the Firebase Admin SDK
+_token_verifier = None
+
+
+def configure_token_verifier(verifier):
+    global _token_verifier
+    _token_verifier = verifier
+
+
+def init_token_verifier(app):
+    """
+    Select the ID-token verifier from AUTH_VERIFIER ("firebase" or "jwt").
+    """
+    if app.config.get('AUTH_VERIFIER', 'firebase') != 'jwt':
+        configure_token_verifier(None)
+        return
+
+    if app.config.get('AUTH_KEYS_FILE'):
+        source = FileKeySource(app.config['AUTH_KEYS_FILE'])
+    else:
+        source = HttpKeySource(app.config.get('AUTH_KEYS_URL') or FIREBASE_CERTS_URL)
+    project_id = app.config.get('FIREBASE_PROJECT_ID')
+    if not project_id:
+        raise ValueError("FIREBASE_PROJECT_ID must be set to verify ID tokens offline.")
+    configure_token_verifier(JwtTokenVerifier(KeySet(source), project_id))
+
+
+def verify_id_token(token):
+    if _token_verifier is None:
+        return auth.verify_id_token(token)
+    return _token_verifier.verify(token)
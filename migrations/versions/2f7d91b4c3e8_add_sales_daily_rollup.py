@@ -0,0 +1,60 @@
+"""Add the sales_daily_rollup table
+
+Revision ID: 2f7d91b4c3e8
+Revises: e8a3c5d07b16
+Create Date: 2026-10-18 16:12:08.441307
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f7d91b4c3e8'
+down_revision = 'e8a3c5d07b16'
+branch_labels = None
+depends_on = None
+
+sales = sa.table(
+    'sales',
+    sa.column('id', sa.Integer),
+    sa.column('barbershop_id', sa.Integer),
+    sa.column('amount', sa.Float),
+    sa.column('expense', sa.Float),
+    sa.column('profit', sa.Float),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def upgrade():
+    rollup = op.create_table('sales_daily_rollup',
+    sa.Column('barbershop_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('expense', sa.Float(), nullable=False),
+    sa.Column('profit', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barbershop_id'], ['barbershops.id'], ),
+    sa.PrimaryKeyConstraint('barbershop_id', 'day')
+    )
+
+    # Sales from before 083129680673 have no created_at, so no day to roll up under
+    op.execute(sales.update().where(sales.c.created_at.is_(None)).values(
+        created_at=sa.func.coalesce(sales.c.updated_at, datetime.now())
+    ))
+
+    # Backfill one row per barbershop and day from the existing sales
+    day = sa.func.date(sales.c.created_at)
+    op.execute(rollup.insert().from_select(
+        ['barbershop_id', 'day', 'sale_count', 'amount', 'expense', 'profit', 'updated_at'],
+        sa.select(sales.c.barbershop_id, day, sa.func.count(sales.c.id), sa.func.sum(sales.c.amount),
+                  sa.func.sum(sales.c.expense), sa.func.coalesce(sa.func.sum(sales.c.profit), 0), sa.func.now())
+        .group_by(sales.c.barbershop_id, day)
+    ))
+
+
+def downgrade():
+    op.drop_table('sales_daily_rollup')
@@ -0,0 +1,48 @@
+"""Add booking_locks and, optionally, a no-overlap exclusion constraint
+
+Revision ID: 3d8a61f0c2e4
+Revises: 9f4b2c6e1a57
+Create Date: 2026-10-18 12:02:51.337468
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8a61f0c2e4'
+down_revision = '9f4b2c6e1a57'
+branch_labels = None
+depends_on = None
+
+
+def _exclusion_constraint_wanted():
+    # Opt-in: needs the btree_gist extension and fails if overlapping
+    # appointments already exist, so it is not applied blindly
+    return (op.get_bind().dialect.name == 'postgresql'
+            and os.getenv('APPOINTMENT_EXCLUSION_CONSTRAINT', '').lower() in ('1', 'true', 'yes'))
+
+
+def upgrade():
+    op.create_table('booking_locks',
+    sa.Column('barber_id', sa.Integer(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['barber_id'], ['barbers.id'], ),
+    sa.PrimaryKeyConstraint('barber_id')
+    )
+
+    if _exclusion_constraint_wanted():
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute(
+            "ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap "
+            "EXCLUDE USING gist (barber_id WITH =, tsrange(appointment_time, end_time) WITH &&) "
+            "WHERE (status <> 'Cancelled')"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap')
+    op.drop_table('booking_locks')
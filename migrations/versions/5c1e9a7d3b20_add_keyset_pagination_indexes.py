@@ -0,0 +1,75 @@
+"""Add composite (created_at, id) indexes for keyset pagination
+
+Revision ID: 5c1e9a7d3b20
+Revises: 083129680673
+Create Date: 2026-10-18 10:05:12.418233
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d3b20'
+down_revision = '083129680673'
+branch_labels = None
+depends_on = None
+
+
+# The column each table is paged on. A row with a NULL key would never match
+# a later page's cursor filter (and could not be encoded in a cursor), so the
+# keys are backfilled from updated_at (or now) and made NOT NULL first.
+KEY_COLUMNS = [
+    ('barbershops', 'created_at'),
+    ('barbers', 'created_at'),
+    ('services', 'created_at'),
+    ('appointments', 'created_at'),
+    ('reviews', 'created_at'),
+    ('payments', 'paid_at'),
+    ('sales', 'created_at'),
+    ('invoices', 'created_at'),
+]
+
+INDEXES = [
+    ('barbershops', 'ix_barbershops_created_at_id', ['created_at', 'id']),
+    ('barbers', 'ix_barbers_created_at_id', ['created_at', 'id']),
+    ('barbers', 'ix_barbers_barbershop_id_created_at_id', ['barbershop_id', 'created_at', 'id']),
+    ('services', 'ix_services_created_at_id', ['created_at', 'id']),
+    ('services', 'ix_services_barbershop_id_created_at_id', ['barbershop_id', 'created_at', 'id']),
+    ('appointments', 'ix_appointments_created_at_id', ['created_at', 'id']),
+    ('appointments', 'ix_appointments_client_id_created_at_id', ['client_id', 'created_at', 'id']),
+    ('appointments', 'ix_appointments_barber_id_created_at_id', ['barber_id', 'created_at', 'id']),
+    ('reviews', 'ix_reviews_created_at_id', ['created_at', 'id']),
+    ('reviews', 'ix_reviews_barber_id_created_at_id', ['barber_id', 'created_at', 'id']),
+    ('payments', 'ix_payments_paid_at_id', ['paid_at', 'id']),
+    ('sales', 'ix_sales_created_at_id', ['created_at', 'id']),
+    ('invoices', 'ix_invoices_created_at_id', ['created_at', 'id']),
+    ('invoices', 'ix_invoices_client_id_created_at_id', ['client_id', 'created_at', 'id']),
+    ('invoices', 'ix_invoices_barbershop_id_created_at_id', ['barbershop_id', 'created_at', 'id']),
+]
+
+
+def upgrade():
+    now = datetime.now()
+    for table, column in KEY_COLUMNS:
+        rows = sa.table(table, sa.column(column, sa.DateTime), sa.column('updated_at', sa.DateTime))
+        op.execute(rows.update().where(rows.c[column].is_(None)).values(
+            {column: sa.func.coalesce(rows.c.updated_at, now)}
+        ))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=False)
+
+    for table, name, columns in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, name, _ in reversed(INDEXES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
+
+    for table, column in reversed(KEY_COLUMNS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=True)
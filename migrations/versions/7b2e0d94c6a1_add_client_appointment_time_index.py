@@ -0,0 +1,28 @@
+"""Add a (client_id, appointment_time, id) index for windowed appointment lists
+
+Revision ID: 7b2e0d94c6a1
+Revises: 3d8a61f0c2e4
+Create Date: 2026-10-18 13:40:27.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e0d94c6a1'
+down_revision = '3d8a61f0c2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The barber side is served by ix_appointments_barber_id_appointment_time_end_time
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_client_id_appointment_time_id',
+                              ['client_id', 'appointment_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_client_id_appointment_time_id')
@@ -0,0 +1,72 @@
+"""Add stored appointments.end_time and the booking conflict index
+
+Revision ID: 9f4b2c6e1a57
+Revises: 5c1e9a7d3b20
+Create Date: 2026-10-18 11:20:37.905114
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f4b2c6e1a57'
+down_revision = '5c1e9a7d3b20'
+branch_labels = None
+depends_on = None
+
+DEFAULT_DURATION = 30
+BATCH_SIZE = 1000
+
+appointments = sa.table(
+    'appointments',
+    sa.column('id', sa.Integer),
+    sa.column('appointment_time', sa.DateTime),
+    sa.column('duration', sa.Integer),
+    sa.column('end_time', sa.DateTime),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('end_time', sa.DateTime(), nullable=True))
+
+    # Backfill end_time = appointment_time + duration, in id order and in
+    # batches; computed in Python so it is the same on SQLite and PostgreSQL
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(appointments.c.id, appointments.c.appointment_time, appointments.c.duration)
+            .where(appointments.c.id > last_id)
+            .order_by(appointments.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            appointments.update()
+            .where(appointments.c.id == sa.bindparam('row_id'))
+            .values(duration=sa.bindparam('row_duration'), end_time=sa.bindparam('row_end_time')),
+            [
+                {
+                    'row_id': row.id,
+                    'row_duration': row.duration or DEFAULT_DURATION,
+                    'row_end_time': row.appointment_time + timedelta(minutes=row.duration or DEFAULT_DURATION),
+                }
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_barber_id_appointment_time_end_time',
+                              ['barber_id', 'appointment_time', 'end_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_barber_id_appointment_time_end_time')
+        batch_op.drop_column('end_time')
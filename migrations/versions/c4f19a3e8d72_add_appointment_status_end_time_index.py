@@ -0,0 +1,26 @@
+"""Add a (status, end_time, id) index for the appointment close-out job
+
+Revision ID: c4f19a3e8d72
+Revises: 7b2e0d94c6a1
+Create Date: 2026-10-18 14:22:09.615530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f19a3e8d72'
+down_revision = '7b2e0d94c6a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_status_end_time_id', ['status', 'end_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_status_end_time_id')
@@ -0,0 +1,49 @@
+"""Add barbers.review_count and barbers.rating_sum
+
+Revision ID: e8a3c5d07b16
+Revises: c4f19a3e8d72
+Create Date: 2026-10-18 15:03:44.270851
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3c5d07b16'
+down_revision = 'c4f19a3e8d72'
+branch_labels = None
+depends_on = None
+
+barbers = sa.table(
+    'barbers',
+    sa.column('id', sa.Integer),
+    sa.column('review_count', sa.Integer),
+    sa.column('rating_sum', sa.Integer),
+)
+
+reviews = sa.table(
+    'reviews',
+    sa.column('id', sa.Integer),
+    sa.column('barber_id', sa.Integer),
+    sa.column('rating', sa.Integer),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('barbers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill both totals with one correlated UPDATE
+    mine = reviews.c.barber_id == barbers.c.id
+    op.execute(barbers.update().values(
+        review_count=sa.select(sa.func.count(reviews.c.id)).where(mine).scalar_subquery(),
+        rating_sum=sa.select(sa.func.coalesce(sa.func.sum(reviews.c.rating), 0)).where(mine).scalar_subquery(),
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('barbers', schema=None) as batch_op:
+        batch_op.drop_column('rating_sum')
+        batch_op.drop_column('review_count')
@@ -1,8 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import event
 from app import db
+from config import Config
 
 class Barbershop(db.Model):
     __tablename__ = 'barbershops'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_barbershops_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     admin_id = db.Column(db.String, nullable=False)
@@ -10,7 +16,7 @@ class Barbershop(db.Model):
     services = db.relationship('Service', backref='barbershop', lazy=True, cascade="all, delete-orphan")
     barbers = db.relationship('Barber', backref='barbershop', lazy=True, cascade="all, delete-orphan")
     photo_url = db.Column(db.String, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def to_dict(self):
@@ -28,16 +34,24 @@ class Barbershop(db.Model):
 
 class Barber(db.Model):
     __tablename__ = 'barbers'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_barbers_created_at_id', 'created_at', 'id'),
+        db.Index('ix_barbers_barbershop_id_created_at_id', 'barbershop_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     uid = db.Column(db.String, nullable=False, unique=True)
     name = db.Column(db.String, nullable=False)
     barbershop_id = db.Column(db.Integer, db.ForeignKey('barbershops.id'))
     available = db.Column(db.Boolean, default=True)
     photo_url = db.Column(db.String, nullable=True)
+    # Running totals of the barber's reviews, kept in step by review_service
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     reviews = db.relationship('Review', backref='barber', lazy=True)
     appointments = db.relationship('Appointment', backref='barber_appointments', lazy=True)  # Updated backref
 
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def to_dict(self):
@@ -48,21 +62,39 @@ class Barber(db.Model):
             "barbershop_id": self.barbershop_id,
             "available": self.available,
             "photo_url": self.photo_url,
+            "review_count": self.review_count,
+            "average_rating": self.average_rating,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "reviews": [review.to_dict() for review in self.reviews]
+            "reviews": [review.to_dict() for review in self.latest_reviews()]
         }
 
+    def latest_reviews(self, limit=None):
+        # Only the newest few are embedded; the full history is paginated
+        # under /api/review/barber/<id>
+        return Review.query.filter_by(barber_id=self.id).order_by(
+            Review.created_at.desc(), Review.id.desc()
+        ).limit(limit or Config.EMBEDDED_REVIEWS).all()
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0
+
 
 class Service(db.Model):
     __tablename__ = 'services'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_services_created_at_id', 'created_at', 'id'),
+        db.Index('ix_services_barbershop_id_created_at_id', 'barbershop_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     price = db.Column(db.Integer, nullable=False)
     barbershop_id = db.Column(db.Integer, db.ForeignKey('barbershops.id'))
     photo_url = db.Column(db.String, nullable=True)
     appointments = db.relationship('Appointment', backref='service_appointments', lazy=True)  # Updated backref
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def to_dict(self):
@@ -79,6 +111,18 @@ class Service(db.Model):
 
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_appointments_created_at_id', 'created_at', 'id'),
+        db.Index('ix_appointments_client_id_created_at_id', 'client_id', 'created_at', 'id'),
+        db.Index('ix_appointments_barber_id_created_at_id', 'barber_id', 'created_at', 'id'),
+        # Booking conflict check: one range probe per barber
+        db.Index('ix_appointments_barber_id_appointment_time_end_time', 'barber_id', 'appointment_time', 'end_time'),
+        # A client's appointments within a time window, in time order
+        db.Index('ix_appointments_client_id_appointment_time_id', 'client_id', 'appointment_time', 'id'),
+        # Close-out job: past appointments still in a given status, oldest first
+        db.Index('ix_appointments_status_end_time_id', 'status', 'end_time', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
     client = db.relationship('Client', backref='client_appointments', lazy=True)  # Updated backref
@@ -86,8 +130,10 @@ class Appointment(db.Model):
     service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
     appointment_time = db.Column(db.DateTime, nullable=False)
     duration = db.Column(db.Integer, nullable=True)
+    # appointment_time + duration, kept in sync by _set_appointment_end_time
+    end_time = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String, default='Scheduled')
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def to_dict(self):
@@ -99,19 +145,44 @@ class Appointment(db.Model):
             'service_id': self.service_id,
             'appointment_time': self.appointment_time.isoformat(),
             'duration': self.duration,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
             'status': self.status,
             'created_at': self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat()
         }
 
 
+@event.listens_for(Appointment, 'before_insert')
+@event.listens_for(Appointment, 'before_update')
+def _set_appointment_end_time(mapper, connection, target):
+    if target.duration is None:
+        target.duration = Config.DEFAULT_APPOINTMENT_DURATION
+    target.end_time = target.appointment_time + timedelta(minutes=target.duration)
+
+
+class BookingLock(db.Model):
+    """
+    One row per barber, written at the start of every booking transaction on
+    databases without SELECT ... FOR UPDATE (SQLite). The write takes the
+    database write lock, so concurrent bookings queue up instead of racing.
+    """
+    __tablename__ = 'booking_locks'
+    barber_id = db.Column(db.Integer, db.ForeignKey('barbers.id'), primary_key=True)
+    locked_at = db.Column(db.DateTime, default=datetime.now)
+
+
 class Review(db.Model):
     __tablename__ = 'reviews'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_reviews_created_at_id', 'created_at', 'id'),
+        db.Index('ix_reviews_barber_id_created_at_id', 'barber_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.String, nullable=True)
     barber_id = db.Column(db.Integer, db.ForeignKey('barbers.id'))
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def to_dict(self):
@@ -127,12 +198,16 @@ class Review(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    # Keyset pagination over (paid_at, id)
+    __table_args__ = (
+        db.Index('ix_payments_paid_at_id', 'paid_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.String, nullable=False)
     amount = db.Column(db.Integer, nullable=False)
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.id'), nullable=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=True)
-    paid_at = db.Column(db.DateTime, default=datetime.now)
+    paid_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     status = db.Column(db.String, default='Pending')
 
@@ -151,6 +226,10 @@ class Payment(db.Model):
 
 class Sale(db.Model):
     __tablename__ = 'sales'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_sales_created_at_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
     barbershop_id = db.Column(db.Integer, db.ForeignKey('barbershops.id'), nullable=False)
@@ -158,7 +237,7 @@ class Sale(db.Model):
     amount = db.Column(db.Float, nullable=False)
     expense = db.Column(db.Float, nullable=False)
     profit = db.Column(db.Float, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def __init__(self, client_id, barbershop_id, invoice_id, amount, expense):
@@ -183,6 +262,21 @@ class Sale(db.Model):
         }
 
 
+class SalesDailyRollup(db.Model):
+    """
+    Per-barbershop, per-day running totals of sales, kept in step with the
+    sales table by sale_services so totals and averages read a few small
+    rows instead of scanning every sale.
+    """
+    __tablename__ = 'sales_daily_rollup'
+    barbershop_id = db.Column(db.Integer, db.ForeignKey('barbershops.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    expense = db.Column(db.Float, nullable=False, default=0)
+    profit = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
 
 class Client(db.Model):
     __tablename__ = 'clients'
@@ -210,13 +304,19 @@ class Client(db.Model):
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    # Keyset pagination over (created_at, id)
+    __table_args__ = (
+        db.Index('ix_invoices_created_at_id', 'created_at', 'id'),
+        db.Index('ix_invoices_client_id_created_at_id', 'client_id', 'created_at', 'id'),
+        db.Index('ix_invoices_barbershop_id_created_at_id', 'barbershop_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
     client = db.relationship('Client', backref='invoices', lazy=True)
     barbershop_id = db.Column(db.Integer, db.ForeignKey('barbershops.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(50), default='Pending')
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     paid_at = db.Column(db.DateTime, nullable=True)
 
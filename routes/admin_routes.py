@@ -2,8 +2,12 @@ from datetime import datetime
 
 from flask_restx import Namespace, Resource, fields
 from flask import request
+from auth_middleware import admin_required
+from utils.pagination import get_page, page_response
+from utils.response_cache import cached_response, get_response_cache_stats
 from app import db
 from models import Barbershop, Service, Barber, Invoice
+from services.appointment_services import BookingConflict
 from services.admin_service import (
     get_all_barbershops, update_payment_status, manage_barbershop,
     manage_barber, manage_service, manage_appointment,
@@ -109,12 +113,24 @@ class SuspendAdmin(Resource):
 @admin_ns.route('/barbershops')
 class BarbershopList(Resource):
     @admin_ns.doc('get_all_barbershops')
+    @cached_response
     def get(self):
         """
         List all barbershops
         """
-        barbershops = get_all_barbershops()
-        return [{'id': shop.id, 'name': shop.name, 'location': shop.location} for shop in barbershops], 200
+        page = get_page()
+        barbershops = get_all_barbershops(page)
+        return page_response([
+            {'id': shop.id, 'name': shop.name, 'location': shop.location, 'created_at': shop.created_at.isoformat()}
+            for shop in barbershops
+        ], page), 200
+
+@admin_ns.route('/response-cache')
+class ResponseCacheStats(Resource):
+    @admin_ns.doc('response_cache_stats', description="Hit ratio, size and memory of the catalog response cache.")
+    @admin_required
+    def get(self):
+        return get_response_cache_stats(), 200
 
 @admin_ns.route('/payment/<string:admin_id>')
 class PaymentStatus(Resource):
@@ -177,7 +193,13 @@ class ManageAppointment(Resource):
         Manage appointment
         """
         data = request.get_json()
-        appointment = manage_appointment(appointment_id, data)
+        try:
+            appointment = manage_appointment(appointment_id, data)
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
         if appointment:
             return appointment.to_dict(), 200
         return {'error': 'Appointment not found'}, 404
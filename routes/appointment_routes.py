@@ -3,11 +3,14 @@ from flask import request
 from services.appointment_services import (
     get_all_appointments,
     create_appointment,
-    get_appointment_by_id,
     update_appointment,
-    delete_appointment, get_upcoming_appointments_for_barber, update_appointment_status
+    delete_appointment, get_upcoming_appointments_for_barber, update_appointment_status,
+    get_appointments_for_client, get_appointments_for_barber, get_appointment_record, APPOINTMENT_COLUMNS,
+    BookingConflict, create_appointments, APPOINTMENT_STATUSES
 )
-from models import Appointment
+from utils.events import sse_response
+from utils.columnar import get_fields, json_response, streaming_json_response, wants_stream
+from utils.pagination import get_page, page_response
 
 # Define Namespace
 appointment_ns = Namespace('appointments', description='Appointments related operations')
@@ -20,6 +23,35 @@ appointment_model = appointment_ns.model('Appointment', {
     'appointment_time': fields.String(required=True, description='Appointment time (YYYY-MM-DD HH:MM:SS)')
 })
 
+batch_model = appointment_ns.model('AppointmentBatch', {
+    'appointments': fields.List(fields.Nested(appointment_ns.model('BatchAppointment', {
+        'client_id': fields.Integer(required=True, description='Client ID'),
+        'barber_id': fields.Integer(required=True, description='Barber ID'),
+        'service_id': fields.Integer(required=True, description='Service ID'),
+        'appointment_time': fields.String(required=True, description='Appointment time (ISO 8601)'),
+        'duration': fields.Integer(description='Duration in minutes')
+    })), required=True, description='Appointments to book')
+})
+
+# Query parameters of the per-client and per-barber appointment lists
+WINDOW_PARAMS = {
+    'from': 'Earliest appointment time, ISO 8601 date or datetime',
+    'to': 'Latest appointment time; a bare date covers the whole day',
+    'status': 'Comma-separated statuses to keep'
+}
+
+
+def _window_args(*names):
+    """The from/to/status filters of the request, as service keyword arguments."""
+    keys = {'from': 'date_from', 'to': 'date_to', 'status': 'status'}
+    return {keys[name]: request.args.get(name) for name in names}
+
+
+def _window_page():
+    # A time window lists appointments in time order, so page on that
+    windowed = 'from' in request.args or 'to' in request.args
+    return get_page('appointment_time' if windowed else 'created_at')
+
 # Routes
 @appointment_ns.route('/')
 class AppointmentList(Resource):
@@ -28,8 +60,11 @@ class AppointmentList(Resource):
         """
         List all appointments
         """
-        appointments = get_all_appointments()
-        return [appointment.to_dict() for appointment in appointments], 200
+        page = get_page()
+        fields = get_fields(APPOINTMENT_COLUMNS)
+        if wants_stream() and page is None:
+            return streaming_json_response(get_all_appointments(stream=True, fields=fields))
+        return json_response(page_response(get_all_appointments(page=page, fields=fields), page))
 
     @appointment_ns.expect(appointment_model)
     @appointment_ns.doc('create_appointment')
@@ -38,9 +73,36 @@ class AppointmentList(Resource):
         Create a new appointment
         """
         data = request.get_json()
-        appointment = create_appointment(data)
+        try:
+            appointment = create_appointment(data)
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return appointment.to_dict(), 201
 
+@appointment_ns.route('/batch')
+class AppointmentBatch(Resource):
+    @appointment_ns.expect(batch_model)
+    @appointment_ns.doc('create_appointments')
+    def post(self):
+        """
+        Book several appointments in one transaction; returns a result per item
+        """
+        data = request.get_json() or {}
+        items = data.get('appointments')
+        if not isinstance(items, list) or not items:
+            return {'error': 'appointments must be a non-empty list'}, 400
+        try:
+            results = create_appointments(items)
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        created = sum(1 for result in results if result['status'] == 201)
+        summary = {'created': created, 'failed': len(results) - created, 'results': results}
+        return summary, 201 if created == len(results) else 207
+
 @appointment_ns.route('/<int:appointment_id>')
 @appointment_ns.param('appointment_id', 'The appointment identifier')
 class Appointment(Resource):
@@ -49,9 +111,9 @@ class Appointment(Resource):
         """
         Get an appointment by ID
         """
-        appointment = get_appointment_by_id(appointment_id)
+        appointment = get_appointment_record(appointment_id, get_fields(APPOINTMENT_COLUMNS))
         if appointment:
-            return appointment.to_dict(), 200
+            return json_response(appointment)
         return {'error': 'Appointment not found'}, 404
 
     @appointment_ns.expect(appointment_model)
@@ -61,7 +123,12 @@ class Appointment(Resource):
         Update an appointment by ID
         """
         data = request.get_json()
-        appointment = update_appointment(appointment_id, data)
+        try:
+            appointment = update_appointment(appointment_id, data)
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            return {'error': str(e)}, 400
         if appointment:
             return appointment.to_dict(), 200
         return {'error': 'Appointment not found'}, 404
@@ -88,9 +155,12 @@ class AppointmentStatus(Resource):
         """
         data = request.get_json()
         status = data.get('status')
-        if status not in ['Scheduled', 'Completed', 'Cancelled']:
+        if status not in APPOINTMENT_STATUSES:
             return {'error': 'Invalid status value'}, 400
-        appointment = update_appointment_status(appointment_id, status)
+        try:
+            appointment = update_appointment_status(appointment_id, status)
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
         if appointment:
             return appointment.to_dict(), 200
         return {'error': 'Appointment not found'}, 404
@@ -98,32 +168,71 @@ class AppointmentStatus(Resource):
 @appointment_ns.route('/barber/<int:barber_id>/upcoming')
 @appointment_ns.param('barber_id', 'The barber identifier')
 class UpcomingAppointments(Resource):
-    @appointment_ns.doc('get_upcoming_appointments_for_barber')
+    @appointment_ns.doc('get_upcoming_appointments_for_barber',
+                        params={key: WINDOW_PARAMS[key] for key in ('to', 'status')})
     def get(self, barber_id):
         """
-        Get all upcoming appointments for a barber
+        Get upcoming appointments for a barber, in time order, optionally up to ?to=
         """
-        appointments = get_upcoming_appointments_for_barber(barber_id)
-        return [appointment.to_dict() for appointment in appointments], 200
+        page = get_page('appointment_time')
+        try:
+            appointments = get_upcoming_appointments_for_barber(
+                barber_id, page, get_fields(APPOINTMENT_COLUMNS), **_window_args('to', 'status')
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(page_response(appointments, page))
 
 @appointment_ns.route('/client/<int:client_id>')
 @appointment_ns.param('client_id', 'The client identifier')
 class ClientAppointments(Resource):
-    @appointment_ns.doc('get_appointments_for_client')
+    @appointment_ns.doc('get_appointments_for_client', params=WINDOW_PARAMS)
     def get(self, client_id):
         """
-        Get all appointments for a specific client
+        Get appointments for a specific client, optionally within ?from=&to= and by ?status=
         """
-        appointments = Appointment.query.filter_by(client_id=client_id).all()
-        return [appointment.to_dict() for appointment in appointments], 200
+        page = _window_page()
+        try:
+            appointments = get_appointments_for_client(
+                client_id, page, get_fields(APPOINTMENT_COLUMNS), **_window_args('from', 'to', 'status')
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(page_response(appointments, page))
 
 @appointment_ns.route('/barber/<int:barber_id>')
 @appointment_ns.param('barber_id', 'The barber identifier')
 class BarberAppointments(Resource):
-    @appointment_ns.doc('get_appointments_for_barber')
+    @appointment_ns.doc('get_appointments_for_barber', params=WINDOW_PARAMS)
     def get(self, barber_id):
         """
-        Get all appointments for a specific barber
+        Get appointments for a specific barber, optionally within ?from=&to= and by ?status=
+        """
+        page = _window_page()
+        try:
+            appointments = get_appointments_for_barber(
+                barber_id, page, get_fields(APPOINTMENT_COLUMNS), **_window_args('from', 'to', 'status')
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(page_response(appointments, page))
+
+@appointment_ns.route('/barber/<int:barber_id>/events')
+@appointment_ns.param('barber_id', 'The barber identifier')
+class BarberAppointmentEvents(Resource):
+    @appointment_ns.doc('stream_appointment_events_for_barber')
+    def get(self, barber_id):
+        """
+        Stream a barber's appointment changes as server-sent events
+        """
+        return sse_response([f'barber:{barber_id}'])
+
+@appointment_ns.route('/barbershop/<int:barbershop_id>/events')
+@appointment_ns.param('barbershop_id', 'The barbershop identifier')
+class BarbershopAppointmentEvents(Resource):
+    @appointment_ns.doc('stream_appointment_events_for_barbershop')
+    def get(self, barbershop_id):
+        """
+        Stream the appointment changes of every barber in a barbershop as server-sent events
         """
-        appointments = Appointment.query.filter_by(barber_id=barber_id).all()
-        return [appointment.to_dict() for appointment in appointments], 200
+        return sse_response([f'barbershop:{barbershop_id}'])
@@ -1,9 +1,15 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from services.barber_service import (
-    get_all_barbers, get_barber_by_id, create_barber, update_barber, delete_barber, update_barber_availability,
-    search_barbers_by_name, get_reviews_for_barber, get_barbers_by_availability, get_barbers_by_barbershop
+    get_all_barbers, get_barber_record, create_barber, update_barber, delete_barber, update_barber_availability,
+    search_barbers_by_name, get_reviews_for_barber, get_barbers_by_availability, get_barbers_by_barbershop,
+    barbershop_barbers_scopes, BARBER_COLUMNS
 )
+from services.availability_service import get_free_slots_for_barber
+from utils.columnar import get_fields, json_response
+from utils.conditional import conditional_response
+from utils.pagination import get_page, page_response
+from utils.response_cache import cached_response
 
 # Define Namespace
 barber_ns = Namespace('barbers', description='Operations related to barbers')
@@ -27,8 +33,9 @@ class BarberList(Resource):
         """
         List all barbers
         """
-        barbers = get_all_barbers()
-        return [barber.to_dict() for barber in barbers], 200
+        page = get_page()
+        barbers = get_all_barbers(page, get_fields(BARBER_COLUMNS))
+        return json_response(page_response(barbers, page))
 
     @barber_ns.expect(barber_model)
     @barber_ns.doc('create_barber')
@@ -51,9 +58,9 @@ class Barber(Resource):
         """
         Get a barber by ID
         """
-        barber = get_barber_by_id(barber_id)
+        barber = get_barber_record(barber_id, get_fields(BARBER_COLUMNS))
         if barber:
-            return barber.to_dict(), 200
+            return json_response(barber)
         return {'error': 'Barber not found'}, 404
 
     @barber_ns.expect(barber_model)
@@ -97,12 +104,41 @@ class BarberAvailability(Resource):
 @barber_ns.route('/barbershop/<int:barbershop_id>')
 class GetBarbersByBarbershop(Resource):
     @barber_ns.doc('get_barbers_by_barbershop')
+    @cached_response
     def get(self, barbershop_id):
         """
         Get all barbers working in a specific barbershop
         """
-        barbers = get_barbers_by_barbershop(barbershop_id)
-        return [barber.to_dict() for barber in barbers], 200 if barbers else {'error': 'No barbers found'}, 404
+        page = get_page()
+        fields = get_fields(BARBER_COLUMNS)
+
+        def build():
+            barbers = get_barbers_by_barbershop(barbershop_id, page, fields)
+            if barbers or page:
+                return json_response(page_response(barbers, page))
+            return {'error': 'No barbers found'}, 404
+
+        return conditional_response(barbershop_barbers_scopes(barbershop_id), build)
+
+@barber_ns.route('/<int:barber_id>/free-slots')
+class BarberFreeSlots(Resource):
+    @barber_ns.doc('get_free_slots_for_barber', params={
+        'from': 'First day, YYYY-MM-DD (default today)',
+        'to': 'Last day, YYYY-MM-DD (default a week from "from")',
+        'duration': 'Appointment length in minutes'
+    })
+    def get(self, barber_id):
+        """
+        Get the open appointment slots of a barber
+        """
+        try:
+            slots = get_free_slots_for_barber(barber_id, request.args.get('from'), request.args.get('to'),
+                                              request.args.get('duration', type=int))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if slots:
+            return json_response(slots)
+        return {'error': 'Barber not found'}, 404
 
 @barber_ns.route('/availability/<string:status>')
 class GetBarbersByAvailability(Resource):
@@ -113,17 +149,22 @@ class GetBarbersByAvailability(Resource):
         """
         available = True if status.lower() == 'available' else False
         barbers = get_barbers_by_availability(available)
-        return [barber.to_dict() for barber in barbers], 200 if barbers else {'error': 'No barbers found with specified availability'}, 404
+        if barbers:
+            return json_response(barbers)
+        return {'error': 'No barbers found with specified availability'}, 404
 
 @barber_ns.route('/<int:barber_id>/reviews')
 class GetBarberReviews(Resource):
     @barber_ns.doc('get_barber_reviews')
     def get(self, barber_id):
         """
-        Get all reviews of a barber
+        Get the reviews of a barber, paginated with ?limit=&cursor=
         """
-        reviews = get_reviews_for_barber(barber_id)
-        return [review.to_dict() for review in reviews], 200 if reviews else {'error': 'No reviews found'}, 404
+        page = get_page()
+        reviews = get_reviews_for_barber(barber_id, page)
+        if reviews or page:
+            return page_response([review.to_dict() for review in reviews], page), 200
+        return {'error': 'No reviews found'}, 404
 
 @barber_ns.route('/search/<string:name>')
 class SearchBarbersByName(Resource):
@@ -133,4 +174,6 @@ class SearchBarbersByName(Resource):
         Search for barbers by name
         """
         barbers = search_barbers_by_name(name)
-        return [barber.to_dict() for barber in barbers], 200 if barbers else {'error': 'No barbers found'}, 404
\ No newline at end of file
+        if barbers:
+            return json_response(barbers)
+        return {'error': 'No barbers found'}, 404
\ No newline at end of file
@@ -2,7 +2,14 @@ from flask_restx import Namespace, Resource, fields
 from flask import request
 from services.barbershop_service import create_barbershop, add_barber_to_barbershop, add_service_to_barbershop, \
     schedule_barber, create_review, check_payment_status, get_all_barbershops, get_barbershop_by_id, update_barbershop, \
-    delete_barbershop, search_barbershops, list_barbers_for_barbershop, list_services_for_barbershop
+    delete_barbershop, search_barbershops, list_services_for_barbershop, \
+    get_barbershop_record, barbershop_scopes, BARBERSHOP_COLUMNS
+from services.availability_service import get_free_slots_for_barbershop
+from services.barber_service import get_barbers_by_barbershop
+from utils.columnar import get_fields, json_response
+from utils.conditional import conditional_response
+from utils.pagination import get_page, page_response
+from utils.response_cache import cached_response
 
 # Define Namespace
 barbershop_ns = Namespace('barbershop', description='Operations related to barbershop')
@@ -55,12 +62,14 @@ class CreateBarbershop(Resource):
         return {'id': barbershop.id}, 201
 
     @barbershop_ns.doc('get_all_barbershops')
+    @cached_response
     def get(self):
         """
         Get all barbershops
         """
-        barbershops = get_all_barbershops()
-        return [barbershop.to_dict() for barbershop in barbershops], 200
+        page = get_page()
+        barbershops = get_all_barbershops(page, get_fields(BARBERSHOP_COLUMNS))
+        return json_response(page_response(barbershops, page))
 
 @barbershop_ns.route('/<int:barbershop_id>')
 class GetBarbershop(Resource):
@@ -69,8 +78,15 @@ class GetBarbershop(Resource):
         """
         Get a specific barbershop by ID
         """
-        barbershop = get_barbershop_by_id(barbershop_id)
-        return barbershop.to_dict(), 200
+        fields = get_fields(BARBERSHOP_COLUMNS)
+
+        def build():
+            barbershop = get_barbershop_record(barbershop_id, fields)
+            if barbershop:
+                return json_response(barbershop)
+            barbershop_ns.abort(404)
+
+        return conditional_response(barbershop_scopes(barbershop_id), build)
 
     @barbershop_ns.expect(update_barbershop_model)
     @barbershop_ns.doc('update_barbershop')
@@ -96,16 +112,19 @@ class GetBarbershop(Resource):
 @barbershop_ns.route('/<int:barbershop_id>/barbers')
 class GetBarbersByBarbershop(Resource):
     @barbershop_ns.doc('get_barbers_by_barbershop')
+    @cached_response
     def get(self, barbershop_id):
         """
         Get all barbers associated with a specific barbershop
         """
-        barbershop = get_barbershop_by_id(barbershop_id)
-        return [barber.to_dict() for barber in barbershop.barbers], 200
+        # Only a 404 check, so none of the shop's relationships are loaded
+        get_barbershop_by_id(barbershop_id, options=())
+        return json_response(get_barbers_by_barbershop(barbershop_id))
 
 @barbershop_ns.route('/<int:barbershop_id>/services')
 class GetServicesByBarbershop(Resource):
     @barbershop_ns.doc('get_services_by_barbershop')
+    @cached_response
     def get(self, barbershop_id):
         """
         Get all services provided by a specific barbershop
@@ -113,6 +132,24 @@ class GetServicesByBarbershop(Resource):
         barbershop = get_barbershop_by_id(barbershop_id)
         return [service.to_dict() for service in barbershop.services], 200
 
+@barbershop_ns.route('/<int:barbershop_id>/free-slots')
+class BarbershopFreeSlots(Resource):
+    @barbershop_ns.doc('get_free_slots_for_barbershop', params={
+        'from': 'First day, YYYY-MM-DD (default today)',
+        'to': 'Last day, YYYY-MM-DD (default a week from "from")',
+        'duration': 'Appointment length in minutes'
+    })
+    def get(self, barbershop_id):
+        """
+        Get the open appointment slots of every barber in a barbershop
+        """
+        try:
+            slots = get_free_slots_for_barbershop(barbershop_id, request.args.get('from'), request.args.get('to'),
+                                                  request.args.get('duration', type=int))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(slots)
+
 @barbershop_ns.route('/<int:barbershop_id>/barber')
 class AddBarber(Resource):
     @barbershop_ns.expect(barber_model)
@@ -189,23 +226,13 @@ class SearchBarbershop(Resource):
         Search barbershops by name or location
         """
         query = request.args.get('query')
-        barbershops = search_barbershops(query)
-        return [barbershop.to_dict() for barbershop in barbershops], 200
-
-@barbershop_ns.route('/<int:barbershop_id>/barbers')
-class BarbersForBarbershop(Resource):
-    @barbershop_ns.doc('list_barbers_for_barbershop')
-    def get(self, barbershop_id):
-        """
-        List all barbers for a barbershop
-        """
-        barbers = list_barbers_for_barbershop(barbershop_id)
-        return [barber.to_dict() for barber in barbers], 200
-
+        barbershops = search_barbershops(query, get_fields(BARBERSHOP_COLUMNS))
+        return json_response(barbershops)
 
 @barbershop_ns.route('/<int:barbershop_id>/services')
 class ServicesForBarbershop(Resource):
     @barbershop_ns.doc('list_services_for_barbershop')
+    @cached_response
     def get(self, barbershop_id):
         """
         List all services for a barbershop
@@ -2,6 +2,9 @@ from flask_restx import Namespace, Resource, fields
 from services.client_service import get_barbershops, get_barbershop_details, create_appointment, update_appointment, \
     get_services_by_barbershop, update_client, delete_client, get_client_by_id, create_client
 from flask import request
+from services.appointment_services import BookingConflict
+from utils.pagination import get_page, page_response
+from utils.response_cache import cached_response
 
 # Define Namespace
 client_ns = Namespace('clients', description='Client related operations')
@@ -78,12 +81,17 @@ class Client(Resource):
 @client_ns.route('/barbershops')
 class BarbershopList(Resource):
     @client_ns.doc('get_barbershops')
+    @cached_response
     def get(self):
         """
         List all barbershops
         """
-        barbershops = get_barbershops()
-        return [{'id': shop.id, 'name': shop.name, 'location': shop.location} for shop in barbershops], 200
+        page = get_page()
+        barbershops = get_barbershops(page)
+        return page_response([
+            {'id': shop.id, 'name': shop.name, 'location': shop.location, 'created_at': shop.created_at.isoformat()}
+            for shop in barbershops
+        ], page), 200
 
 
 @client_ns.route('/barbershop/<int:barbershop_id>')
@@ -108,12 +116,15 @@ class Appointment(Resource):
         Create a new appointment
         """
         data = request.get_json()
-        appointment = create_appointment(
-            client_id=data.get('client_id'),
-            barber_id=data.get('barber_id'),
-            service_id=data.get('service_id'),
-            appointment_time=data.get('appointment_time')
-        )
+        try:
+            appointment = create_appointment(
+                client_id=data.get('client_id'),
+                barber_id=data.get('barber_id'),
+                service_id=data.get('service_id'),
+                appointment_time=data.get('appointment_time')
+            )
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
         return appointment.to_dict(), 201
 
 @client_ns.route('/appointment/<int:appointment_id>')
@@ -125,12 +136,15 @@ class UpdateAppointment(Resource):
         Update an existing appointment
         """
         data = request.get_json()
-        updated_appointment = update_appointment(
-            appointment_id,
-            barber_id=data.get('barber_id'),
-            service_id=data.get('service_id'),
-            appointment_time=data.get('appointment_time')
-        )
+        try:
+            updated_appointment = update_appointment(
+                appointment_id,
+                barber_id=data.get('barber_id'),
+                service_id=data.get('service_id'),
+                appointment_time=data.get('appointment_time')
+            )
+        except BookingConflict as e:
+            return {'error': str(e)}, 409
         if updated_appointment:
             return updated_appointment.to_dict(), 200
         return {'error': 'Appointment not found'}, 404
@@ -139,9 +153,11 @@ class UpdateAppointment(Resource):
 @client_ns.route('/barbershop/<int:barbershop_id>/services')
 class BarbershopServices(Resource):
     @client_ns.doc('get_services_by_barbershop')
+    @cached_response
     def get(self, barbershop_id):
         """
         Get all services offered by a specific barbershop
         """
-        services = get_services_by_barbershop(barbershop_id)
-        return [service.to_dict() for service in services], 200
+        page = get_page()
+        services = get_services_by_barbershop(barbershop_id, page)
+        return page_response([service.to_dict() for service in services], page), 200
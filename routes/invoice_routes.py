@@ -2,13 +2,16 @@ from flask import request
 from flask_restx import Namespace, Resource, fields
 from services.invoice_service import (
     create_invoice,
-    get_invoice_by_id,
     get_all_invoices,
     update_invoice,
     delete_invoice,
     get_invoices_for_client,
-    get_invoices_for_barbershop
+    get_invoices_for_barbershop,
+    get_invoice_record,
+    INVOICE_COLUMNS
 )
+from utils.columnar import get_fields, json_response, streaming_json_response, wants_stream
+from utils.pagination import get_page, page_response
 
 # Define Namespace
 invoice_ns = Namespace('invoices', description='Operations related to invoices')
@@ -33,8 +36,11 @@ class InvoiceList(Resource):
         """
         Get all invoices.
         """
-        invoices = get_all_invoices()
-        return [invoice.to_dict() for invoice in invoices], 200
+        page = get_page()
+        fields = get_fields(INVOICE_COLUMNS)
+        if wants_stream() and page is None:
+            return streaming_json_response(get_all_invoices(stream=True, fields=fields))
+        return json_response(page_response(get_all_invoices(page=page, fields=fields), page))
 
     @invoice_ns.expect(invoice_model)
     @invoice_ns.doc('create_invoice')
@@ -53,9 +59,9 @@ class Invoice(Resource):
         """
         Get an invoice by ID.
         """
-        invoice = get_invoice_by_id(invoice_id)
+        invoice = get_invoice_record(invoice_id, get_fields(INVOICE_COLUMNS))
         if invoice:
-            return invoice.to_dict(), 200
+            return json_response(invoice)
         else:
             return {'error': 'Invoice not found'}, 404
 
@@ -89,8 +95,9 @@ class ClientInvoices(Resource):
         """
         Get all invoices for a specific client.
         """
-        invoices = get_invoices_for_client(client_id)
-        return [invoice.to_dict() for invoice in invoices], 200
+        page = get_page()
+        invoices = get_invoices_for_client(client_id, page, get_fields(INVOICE_COLUMNS))
+        return json_response(page_response(invoices, page))
 
 @invoice_ns.route('/barbershop/<int:barbershop_id>')
 @invoice_ns.param('barbershop_id', 'The barbershop identifier')
@@ -100,5 +107,6 @@ class BarbershopInvoices(Resource):
         """
         Get all invoices for a specific barbershop.
         """
-        invoices = get_invoices_for_barbershop(barbershop_id)
-        return [invoice.to_dict() for invoice in invoices], 200
+        page = get_page()
+        invoices = get_invoices_for_barbershop(barbershop_id, page, get_fields(INVOICE_COLUMNS))
+        return json_response(page_response(invoices, page))
@@ -4,6 +4,8 @@ from services.payment_service import (
     get_all_payments, create_payment, delete_payment,
     update_payment, get_payments_by_invoice, get_payments_by_sale
 )
+from utils.columnar import json_response, streaming_json_response, wants_stream
+from utils.pagination import get_page, page_response
 
 # Create Namespace for the payment routes
 payment_ns = Namespace('payments', description='Operations related to payments')
@@ -25,8 +27,10 @@ class PaymentList(Resource):
         """
         Get all payments
         """
-        payments = get_all_payments()
-        return [payment.to_dict() for payment in payments], 200
+        page = get_page('paid_at')
+        if wants_stream() and page is None:
+            return streaming_json_response(get_all_payments(stream=True))
+        return json_response(page_response(get_all_payments(page=page), page))
 
     @payment_ns.expect(payment_model)
     @payment_ns.doc('create_payment')
@@ -1,7 +1,11 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
 from services.review_service import get_reviews, create_review, update_review, delete_review, get_reviews_by_barber_id, \
-    get_average_rating_for_barber, can_user_leave_review
+    get_average_rating_for_barber, can_user_leave_review, get_rating_summaries_for_barbers, \
+    get_rating_summaries_for_barbershop
+from config import Config
+from utils.columnar import json_response, streaming_json_response, wants_stream
+from utils.pagination import get_page, page_response
 
 # Define Namespace
 review_ns = Namespace('reviews', description='Operations related to reviews')
@@ -27,8 +31,10 @@ class ReviewList(Resource):
         """
         Get all reviews
         """
-        reviews = get_reviews()
-        return [review.to_dict() for review in reviews], 200
+        page = get_page()
+        if wants_stream() and page is None:
+            return streaming_json_response(get_reviews(stream=True))
+        return json_response(page_response(get_reviews(page=page), page))
 
     @review_ns.expect(review_model)
     @review_ns.doc('create_review')
@@ -82,9 +88,10 @@ class BarberReviews(Resource):
         """
         Get all reviews for a specific barber
         """
-        reviews = get_reviews_by_barber_id(barber_id)
-        if reviews:
-            return [review.to_dict() for review in reviews], 200
+        page = get_page()
+        reviews = get_reviews_by_barber_id(barber_id, page)
+        if reviews or page:
+            return page_response([review.to_dict() for review in reviews], page), 200
         return {'error': 'No reviews found for this barber'}, 404
 
 @review_ns.route('/barber/<int:barber_id>/average-rating')
@@ -97,6 +104,34 @@ class BarberAverageRating(Resource):
         average_rating = get_average_rating_for_barber(barber_id)
         return {'barber_id': barber_id, 'average_rating': average_rating}, 200
 
+@review_ns.route('/ratings')
+class RatingSummaries(Resource):
+    @review_ns.doc('get_rating_summaries', params={
+        'barber_ids': 'Comma-separated barber IDs',
+        'barbershop_id': 'Every barber of this barbershop (used when barber_ids is absent)'
+    })
+    def get(self):
+        """
+        Get review count, average rating and star histogram for many barbers at once
+        """
+        barber_ids = request.args.get('barber_ids')
+        if barber_ids:
+            try:
+                ids = sorted({int(value) for value in barber_ids.split(',') if value.strip()})
+            except ValueError:
+                return {'error': 'barber_ids must be a comma-separated list of integers'}, 400
+            if len(ids) > Config.MAX_PAGE_SIZE:
+                return {'error': f'At most {Config.MAX_PAGE_SIZE} barber_ids per request'}, 400
+            return json_response({'barbers': get_rating_summaries_for_barbers(ids)})
+
+        barbershop_id = request.args.get('barbershop_id', type=int)
+        if barbershop_id is None:
+            return {'error': 'Either barber_ids or barbershop_id is required'}, 400
+        return json_response({
+            'barbershop_id': barbershop_id,
+            'barbers': get_rating_summaries_for_barbershop(barbershop_id)
+        })
+
 @review_ns.route('/barber/<int:barber_id>/can-review')
 class CanReview(Resource):
     @review_ns.doc('can_user_leave_review')
@@ -4,6 +4,9 @@ from services.sale_services import (
     create_sale, update_sale, delete_sale,
     get_total_sales, get_average_sale, get_all_sales
 )
+from services.analytics_service import get_sales_analytics
+from utils.columnar import json_response, streaming_json_response, wants_stream
+from utils.pagination import get_page, page_response
 
 
 # Define Namespace
@@ -26,8 +29,10 @@ class SaleList(Resource):
         """
         Get all sales
         """
-        sales = get_all_sales()
-        return [sale.to_dict() for sale in sales], 200
+        page = get_page()
+        if wants_stream() and page is None:
+            return streaming_json_response(get_all_sales(stream=True))
+        return json_response(page_response(get_all_sales(page=page), page))
 
     @sale_ns.expect(sale_model)
     @sale_ns.doc('create_sale')
@@ -63,24 +68,68 @@ class SaleResource(Resource):
             return {'message': 'Sale deleted successfully'}, 200
         return {'error': 'Sale not found'}, 404
 
+# Query parameters of the rollup-backed sale statistics
+SALE_FILTER_PARAMS = {
+    'barbershop_id': 'Only this barbershop',
+    'from': 'First day, YYYY-MM-DD',
+    'to': 'Last day, YYYY-MM-DD'
+}
+
+
+def _sale_filters():
+    return {
+        'barbershop_id': request.args.get('barbershop_id', type=int),
+        'date_from': request.args.get('from'),
+        'date_to': request.args.get('to')
+    }
+
 @sale_ns.route('/totals')
 class SaleTotals(Resource):
-    @sale_ns.doc('get_total_sales')
+    @sale_ns.doc('get_total_sales', params=SALE_FILTER_PARAMS)
     def get(self):
         """
         Get total sales, expenses, and profit
         """
-        totals = get_total_sales()
+        try:
+            totals = get_total_sales(**_sale_filters())
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return totals, 200
 
 @sale_ns.route('/average')
 class AverageSale(Resource):
-    @sale_ns.doc('get_average_sale')
+    @sale_ns.doc('get_average_sale', params=SALE_FILTER_PARAMS)
     def get(self):
         """
         Get the average sale amount
         """
-        barbershop_id = request.args.get('barbershop_id', type=int)
-        barber_id = request.args.get('barber_id', type=int)
-        avg_sale = get_average_sale(barbershop_id=barbershop_id, barber_id=barber_id)
+        try:
+            avg_sale = get_average_sale(**_sale_filters())
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return {'average_sale': avg_sale}, 200
+
+@sale_ns.route('/analytics')
+class SaleAnalytics(Resource):
+    @sale_ns.doc('get_sales_analytics', params={
+        'barbershop_id': 'Barbershop (required)',
+        'bucket': 'day, week or month (default day)',
+        'from': 'First day, YYYY-MM-DD; widened to the start of its bucket',
+        'to': 'Last day, YYYY-MM-DD (default today)',
+        'compare': 'previous (the buckets just before) or year (the same buckets a year earlier)'
+    })
+    def get(self):
+        """
+        Get revenue, expenses and profit per day, week or month for a barbershop
+        """
+        try:
+            analytics = get_sales_analytics(
+                request.args.get('barbershop_id', type=int),
+                bucket=request.args.get('bucket', 'day'),
+                date_from=request.args.get('from'),
+                date_to=request.args.get('to'),
+                compare=request.args.get('compare')
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return json_response(analytics)
@@ -1,7 +1,11 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
-from services.service_service import create_service, get_all_services, get_service_by_id, update_service, \
-    delete_service, get_services_by_barbershop_id
+from services.service_service import create_service, get_all_services, update_service, \
+    delete_service, get_services_by_barbershop_id, get_service_record, barbershop_services_scopes, SERVICE_COLUMNS
+from utils.columnar import get_fields, json_response
+from utils.conditional import conditional_response
+from utils.pagination import get_page, page_response
+from utils.response_cache import cached_response
 
 # Define Namespace
 service_ns = Namespace('services', description='Operations related to services')
@@ -43,8 +47,9 @@ class ServiceList(Resource):
         """
         Get all services
         """
-        services = get_all_services()
-        return [service.to_dict() for service in services], 200
+        page = get_page()
+        services = get_all_services(page, get_fields(SERVICE_COLUMNS))
+        return json_response(page_response(services, page))
 
 
 @service_ns.route('/<int:service_id>')
@@ -54,9 +59,9 @@ class Service(Resource):
         """
         Get a service by ID
         """
-        service = get_service_by_id(service_id)
+        service = get_service_record(service_id, get_fields(SERVICE_COLUMNS))
         if service:
-            return service.to_dict(), 200
+            return json_response(service)
         return {'error': 'Service not found'}, 404
 
     @service_ns.expect(update_service_model)
@@ -87,12 +92,19 @@ class Service(Resource):
 @service_ns.route('/barbershop/<int:barbershop_id>')
 class ServicesByBarbershop(Resource):
     @service_ns.doc('get_services_by_barbershop_id')
+    @cached_response
     def get(self, barbershop_id):
         """
         Get all services for a specific barbershop
         """
-        services = get_services_by_barbershop_id(barbershop_id)
-        if services:
-            return [service.to_dict() for service in services], 200
-        return {'error': 'No services found for this barbershop'}, 404
+        page = get_page()
+        fields = get_fields(SERVICE_COLUMNS)
+
+        def build():
+            services = get_services_by_barbershop_id(barbershop_id, page, fields)
+            if services or page:
+                return json_response(page_response(services, page))
+            return {'error': 'No services found for this barbershop'}, 404
+
+        return conditional_response(barbershop_services_scopes(barbershop_id), build)
 
@@ -1,7 +1,7 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
-from firebase_admin import auth
-from services.user_service import create_user, get_user_by_uid, delete_user, update_user, update_user_role
+from auth_middleware import authenticate, current_user
+from services.user_service import create_user, delete_user, update_user, update_user_role
 import logging
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -78,26 +78,13 @@ class UserSignupVerify(Resource):
             role = data.get('role')
 
             # Verify Firebase ID token
-            decoded_token = auth.verify_id_token(token)
+            decoded_token = authenticate(token)
             uid = decoded_token['uid']
 
-            # Save user data based on role
+            # Save user data based on role; custom claims are synced to Firebase in the background
             data['uid'] = uid
             user = create_user(data, role)
 
-            # Set custom claims for the user in Firebase
-            if role == "admin":
-                custom_claims = {"admin": True, "barber": False, "client": False}
-            elif role == "barber":
-                custom_claims = {"admin": False, "barber": True, "client": False}
-            elif role == "client":
-                custom_claims = {"admin": False, "barber": False, "client": True}
-            else:
-                raise ValueError("Invalid role provided")
-
-            # Assign the custom claims to the Firebase user
-            auth.set_custom_user_claims(uid, custom_claims)
-
             return {"message": "User successfully registered", "user": user.to_dict()}, 201
 
         except Exception as e:
@@ -125,12 +112,11 @@ class UserLogin(Resource):
                 raise ValueError("Missing required field: token")
 
             # Verify Firebase ID token
-            decoded_token = auth.verify_id_token(token)
-            uid = decoded_token['uid']
+            decoded_token = authenticate(token)
             logging.debug(f"Decoded Firebase token: {decoded_token}")
 
             # Check user role by looking into the relevant tables
-            user, role = get_user_by_uid(uid)
+            user, role = current_user()
             if user:
                 logging.info(f"User login successful: {user.to_dict()}")
                 return {"role": role, "name": user.name, "email": user.email}, 200
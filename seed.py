@@ -1,5 +1,7 @@
 from app import db, create_app
 from models import Admin, Client, Barber, Barbershop, Service, Review, Payment, Sale, Appointment, Invoice
+from services.review_service import recompute_barber_ratings
+from services.sale_services import rebuild_sales_rollup
 from datetime import datetime
 from faker import Faker
 import random
@@ -176,4 +178,8 @@ with app.app_context():
     db.session.add_all(invoices)
     db.session.commit()
 
+    # 10. Derive the totals kept alongside reviews and sales
+    recompute_barber_ratings()
+    rebuild_sales_rollup()
+
     print("Database seeded successfully!")
@@ -1,6 +1,12 @@
 from models import Barbershop, Payment, Barber, Service, Appointment, Sale, Review, Invoice, Client, Admin
 from app import db
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from services.appointment_services import ensure_appointment_is_free, is_overlap_violation, BookingConflict, \
+    publish_appointment_events, validate_duration
+from services.review_service import move_review_rating
+from services.sale_services import apply_sale_to_rollup, date_sale, sale_rollup_key
+from utils.pagination import paginate
 
 # Utility function for updating entity attributes
 def create_admin(data):
@@ -35,16 +41,19 @@ def get_admin_by_id(admin_id):
     return Admin.query.get(admin_id)
 
 
-def update_entity(entity, data):
-    for key, value in data.items():
-        if hasattr(entity, key):
-            setattr(entity, key, value)
+def update_entity(entity, data, validate=None):
+    with db.session.no_autoflush:
+        for key, value in data.items():
+            if hasattr(entity, key):
+                setattr(entity, key, value)
+        if validate is not None:
+            validate(entity)
     db.session.commit()
     return entity
 
 # Admin Services
-def get_all_barbershops():
-    return Barbershop.query.all()
+def get_all_barbershops(page=None):
+    return paginate(Barbershop.query, page, Barbershop.created_at, Barbershop.id).all()
 
 
 def update_payment_status(admin_id, status):  # Replaced owner_id with admin_id
@@ -80,10 +89,23 @@ def manage_service(service_id, data):
 def manage_appointment(appointment_id, data):
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
-        raise ValueError(f"Appointment with id {appointment_id} not found")
+        # None is a 404; a ValueError is reserved for invalid data (a 400)
+        return None
     if 'appointment_time' in data:
         data['appointment_time'] = datetime.strptime(data['appointment_time'], "%Y-%m-%d %H:%M:%S")
-    return update_entity(appointment, data)
+    if 'duration' in data:
+        data['duration'] = validate_duration(data['duration'])
+    previous_barber_id = appointment.barber_id
+    try:
+        update_entity(appointment, data, validate=ensure_appointment_is_free)
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_overlap_violation(e):
+            raise BookingConflict() from e
+        raise
+    moved = previous_barber_id if appointment.barber_id != previous_barber_id else None
+    publish_appointment_events('updated', [appointment_id], moved)
+    return appointment
 
 
 def manage_invoice(invoice_id, data):
@@ -99,14 +121,23 @@ def manage_sale(sale_id, data):
     sale = Sale.query.get(sale_id)
     if not sale:
         raise ValueError(f"Sale with id {sale_id} not found")
-    return update_entity(sale, data)
+    old = sale_rollup_key(date_sale(sale))
+
+    def recompute(entity):
+        # Same invariant update_sale keeps, then move the sale in the daily rollup
+        entity.profit = entity.amount - entity.expense
+        apply_sale_to_rollup(old, sale_rollup_key(entity))
+
+    return update_entity(sale, data, validate=recompute)
 
 
 def manage_client_review(review_id, data):
     review = Review.query.get(review_id)
     if not review:
         raise ValueError(f"Review with id {review_id} not found")
-    return update_entity(review, data)
+    old = (review.barber_id, review.rating)
+    # Runs before update_entity commits, so the totals change in the same transaction
+    return update_entity(review, data, validate=lambda r: move_review_rating(old, (r.barber_id, r.rating)))
 
 
 def manage_client(client_id, data):
@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+from sqlalchemy import Date, func, select, type_coerce
+from app import db
+from config import Config
+from models import SalesDailyRollup
+from utils.cache import CommitInvalidatedCache
+from utils.helpers import parse_day
+
+# Revenue, expense and profit per day, week (ISO, Monday first) or month for
+# one barbershop, grouped in SQL over sales_daily_rollup. A bucket that ended
+# before today is closed: its totals are cached in bucket_cache.
+
+BUCKETS = ('day', 'week', 'month')
+COMPARISONS = ('previous', 'year')
+# Buckets returned when 'from' is not given
+DEFAULT_SPAN = {'day': 30, 'week': 12, 'month': 12}
+
+_TOTALS = ('sale_count', 'amount', 'expense', 'profit')
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _buckets_holding(key):
+    barbershop_id, day = key
+    return [(barbershop_id, bucket, bucket_start(day, bucket)) for bucket in BUCKETS]
+
+
+# Totals of closed buckets, by (barbershop_id, bucket, start). sale_services
+# marks the (barbershop_id, day) of every rollup delta, and the day, week and
+# month buckets holding that day are dropped once the transaction commits.
+# A closed bucket only changes through such a delta, so by default it is
+# kept until then (or until evicted).
+bucket_cache = CommitInvalidatedCache('rollup_days', maxsize=Config.ANALYTICS_CACHE_SIZE,
+                                      ttl=Config.ANALYTICS_CACHE_TTL or float('inf'), expand=_buckets_holding)
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1)
+
+
+def shift_bucket(start, bucket, count):
+    """The start of the bucket ``count`` buckets after (or before, if negative) ``start``."""
+    if bucket == 'month':
+        return _add_months(start, count)
+    return start + timedelta(days=count * (7 if bucket == 'week' else 1))
+
+
+def _bucket_expression(bucket):
+    day = SalesDailyRollup.day
+    if bucket == 'day':
+        return day
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # 'weekday 0' moves to the coming Sunday (or stays on one), so -6 days is that week's Monday
+        modifiers = ('weekday 0', '-6 days') if bucket == 'week' else ('start of month',)
+        return type_coerce(func.date(day, *modifiers), Date)
+    return type_coerce(func.date(func.date_trunc(bucket, day)), Date)
+
+
+def _query_buckets(barbershop_id, bucket, first, last):
+    """Totals of every bucket with sales between the bucket starts ``first`` and ``last``, in one GROUP BY."""
+    start = _bucket_expression(bucket).label('start')
+    stmt = select(start, *[func.sum(getattr(SalesDailyRollup, name)) for name in _TOTALS]).where(
+        SalesDailyRollup.barbershop_id == barbershop_id,
+        SalesDailyRollup.day >= first,
+        SalesDailyRollup.day < shift_bucket(last, bucket, 1)
+    ).group_by(start)
+    return {row[0]: dict(zip(_TOTALS, row[1:])) for row in db.session.execute(stmt)}
+
+
+def _series(barbershop_id, bucket, first, count, today):
+    """``count`` buckets from the bucket starting ``first``, closed ones read from bucket_cache."""
+    starts = [shift_bucket(first, bucket, n) for n in range(count)]
+    closed = {start: shift_bucket(start, bucket, 1) <= today for start in starts}
+    totals = {start: bucket_cache.get((barbershop_id, bucket, start)) for start in starts if closed[start]}
+    missing = [start for start in starts if totals.get(start) is None]
+    if missing:
+        generation = bucket_cache.generation
+        found = _query_buckets(barbershop_id, bucket, missing[0], missing[-1])
+        for start in missing:
+            totals[start] = found.get(start) or dict.fromkeys(_TOTALS, 0)
+            if closed[start]:
+                bucket_cache.set_current(generation, (barbershop_id, bucket, start), totals[start])
+
+    series = []
+    for start in starts:
+        end = shift_bucket(start, bucket, 1) - timedelta(days=1)
+        series.append({'start': start.isoformat(), 'end': end.isoformat(), 'closed': closed[start], **totals[start]})
+    return series
+
+
+def _summary(series):
+    totals = {name: sum(item[name] for item in series) for name in _TOTALS}
+    totals['average_sale'] = totals['amount'] / totals['sale_count'] if totals['sale_count'] else 0
+    return totals
+
+
+def _change(current, previous):
+    """Percent change of each total, None where the comparison period had none."""
+    return {name: (current[name] - previous[name]) / abs(previous[name]) * 100 if previous[name] else None
+            for name in (*_TOTALS, 'average_sale')}
+
+
+# Service to get a barbershop's bucketed sales series, optionally against a comparison period
+def get_sales_analytics(barbershop_id, bucket='day', date_from=None, date_to=None, compare=None, today=None):
+    """
+    ``from``/``to`` are widened to whole buckets; ``to`` defaults to today and
+    ``from`` to DEFAULT_SPAN buckets before it. ``compare`` adds the same
+    number of buckets either just before the range ('previous') or a year
+    earlier ('year': 12 months back, or 52 weeks back so weekdays line up).
+    """
+    if not barbershop_id:
+        raise ValueError("'barbershop_id' is required.")
+    if bucket not in BUCKETS:
+        raise ValueError(f"'bucket' must be one of: {', '.join(BUCKETS)}.")
+    if compare and compare not in COMPARISONS:
+        raise ValueError(f"'compare' must be one of: {', '.join(COMPARISONS)}.")
+    today = today or date.today()
+    last = bucket_start(parse_day(date_to, 'to') or today, bucket)
+    first = parse_day(date_from, 'from')
+    first = bucket_start(first, bucket) if first else shift_bucket(last, bucket, 1 - DEFAULT_SPAN[bucket])
+    if last < first:
+        raise ValueError("'to' must not be before 'from'.")
+    count = 1
+    while shift_bucket(first, bucket, count) <= last:
+        count += 1
+        if count > Config.ANALYTICS_MAX_BUCKETS:
+            raise ValueError(f"At most {Config.ANALYTICS_MAX_BUCKETS} {bucket} buckets can be requested.")
+
+    series = _series(barbershop_id, bucket, first, count, today)
+    result = {
+        'barbershop_id': barbershop_id,
+        'bucket': bucket,
+        'from': series[0]['start'],
+        'to': series[-1]['end'],
+        'series': series,
+        'totals': _summary(series)
+    }
+    if compare:
+        if compare == 'previous':
+            offset = -count
+        else:
+            offset = -12 if bucket == 'month' else -52 * (7 if bucket == 'day' else 1)
+        compared = _series(barbershop_id, bucket, shift_bucket(first, bucket, offset), count, today)
+        result['compare'] = {
+            'period': compare,
+            'from': compared[0]['start'],
+            'to': compared[-1]['end'],
+            'series': compared,
+            'totals': _summary(compared),
+            'change': _change(result['totals'], _summary(compared))
+        }
+    return result
+
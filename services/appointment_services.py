@@ -1,63 +1,446 @@
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from sqlalchemy import and_, literal, or_, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from app import db
-from models import Appointment
-from datetime import datetime
+from config import Config
+from models import Appointment, Barber, BookingLock, Client, Service
+from datetime import datetime, timedelta
+from utils.columnar import ColumnSpec
+from utils.events import has_listeners, publish
+from utils.pagination import paginate
 
-# Service to retrieve all appointments
-def get_all_appointments():
-    return Appointment.query.all()
+# Columns of Appointment.to_dict(), selected directly for list endpoints
+APPOINTMENT_COLUMNS = ColumnSpec(Appointment, [
+    ('id', Appointment.id),
+    ('client_id', Appointment.client_id),
+    ('client_name', Client.name),
+    ('barber_id', Appointment.barber_id),
+    ('service_id', Appointment.service_id),
+    ('appointment_time', Appointment.appointment_time),
+    ('duration', Appointment.duration),
+    ('end_time', Appointment.end_time),
+    ('status', Appointment.status),
+    ('created_at', Appointment.created_at),
+    ('updated_at', Appointment.updated_at),
+], joins=[(Client, Appointment.client_id == Client.id)])
+
+# Every status an appointment can be in
+APPOINTMENT_STATUSES = ('Scheduled', 'Completed', 'Cancelled', 'No-show')
+
+# Appointments in these states no longer hold their slot
+INACTIVE_STATUSES = ('Cancelled',)
+
+
+# SQLSTATE of an exclusion-constraint violation (PostgreSQL appointments_no_overlap)
+EXCLUSION_VIOLATION = '23P01'
+
+
+class BookingConflict(ValueError):
+    """The barber already has an appointment overlapping the requested slot."""
+
+    def __init__(self, message="The barber is already booked at this time."):
+        super().__init__(message)
+
+
+def is_overlap_violation(error):
+    orig = error.orig
+    return EXCLUSION_VIOLATION in (getattr(orig, 'pgcode', None), getattr(orig, 'sqlstate', None))
+
+
+@contextmanager
+def booking_errors():
+    """Roll back on an IntegrityError and raise a violated overlap constraint as BookingConflict."""
+    try:
+        yield
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_overlap_violation(e):
+            raise BookingConflict() from e
+        raise
+
+
+# Service to commit a booking; the database constraint, where there is one, has the last word
+def commit_booking():
+    with booking_errors():
+        db.session.commit()
+
+
+def _publish(event_type, records, extra_barber_ids=()):
+    barber_ids = {record['barber_id'] for record in records} | set(extra_barber_ids)
+    shops = dict(db.session.execute(
+        select(Barber.id, Barber.barbershop_id).where(Barber.id.in_(barber_ids))
+    ).all())
+    for record in records:
+        involved = {record['barber_id'], *extra_barber_ids}
+        channels = {f'barber:{barber_id}' for barber_id in involved}
+        channels |= {f'barbershop:{shops[barber_id]}' for barber_id in involved if shops.get(barber_id)}
+        publish(event_type, channels, {'type': event_type, 'appointment': record})
+
+
+# Service to push committed appointment changes to the barber and barbershop event streams
+def publish_appointment_events(event_type, appointment_ids, previous_barber_id=None):
+    """
+    ``event_type`` is "created", "updated" or "status". When an update moved
+    the appointment to another barber, ``previous_barber_id`` is told too.
+    """
+    if not appointment_ids or not has_listeners():
+        return
+    records = APPOINTMENT_COLUMNS.fetch(APPOINTMENT_COLUMNS.select().where(Appointment.id.in_(appointment_ids)))
+    extra = [previous_barber_id] if previous_barber_id is not None else []
+    _publish(event_type, records, extra)
+
+
+# Service to push a deleted appointment to the barber and barbershop event streams
+def publish_appointment_deleted(appointment_id, barber_id):
+    if has_listeners():
+        _publish('deleted', [{'id': appointment_id, 'barber_id': barber_id}])
+
+
+# Service to validate a duration in minutes, defaulting it when missing
+def validate_duration(duration=None):
+    if duration is None:
+        duration = Config.DEFAULT_APPOINTMENT_DURATION
+    try:
+        minutes = int(duration)
+    except (TypeError, ValueError):
+        raise ValueError("'duration' must be a whole number of minutes.")
+    if isinstance(duration, bool) or minutes != float(duration):
+        raise ValueError("'duration' must be a whole number of minutes.")
+    duration = minutes
+    if not 0 < duration <= Config.MAX_APPOINTMENT_DURATION:
+        raise ValueError(f"Duration must be between 1 and {Config.MAX_APPOINTMENT_DURATION} minutes.")
+    return duration
+
+
+# Service to validate a duration (in minutes) and work out when the slot ends
+def appointment_end_time(start, duration=None):
+    return start + timedelta(minutes=validate_duration(duration))
+
+
+# Criteria matching the barber's active appointments that overlap [start, end)
+def _overlapping(barber_id, start, end):
+    return and_(
+        Appointment.barber_id == barber_id,
+        # No appointment is longer than the maximum, so anything overlapping
+        # starts inside this window: a single range on the barber's index
+        Appointment.appointment_time > start - timedelta(minutes=Config.MAX_APPOINTMENT_DURATION),
+        Appointment.appointment_time < end,
+        Appointment.end_time > start,
+        Appointment.status.notin_(INACTIVE_STATUSES)
+    )
+
+
+# Service to find an active appointment of the barber overlapping [start, end)
+def find_conflicting_appointment(barber_id, start, end, exclude_id=None):
+    query = Appointment.query.filter(_overlapping(barber_id, start, end))
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    return query.first()
+
+
+# Service to serialize bookings of one barber until the current transaction ends
+def lock_barber_schedule(barber_id):
+    """
+    Lock the barber's schedule for the rest of the transaction, so the
+    conflict check and the insert that follows cannot interleave with another
+    worker's. Bookings of other barbers are not blocked where the database
+    has row locks.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # No row locks: any write takes SQLite's database lock, held to commit
+        stmt = sqlite_insert(BookingLock).values(barber_id=barber_id, locked_at=datetime.now())
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[BookingLock.barber_id], set_={'locked_at': stmt.excluded.locked_at}
+        ))
+    else:
+        # FOR NO KEY UPDATE on PostgreSQL: excludes other bookings of this
+        # barber without blocking foreign-key checks against the row
+        db.session.execute(select(Barber.id).where(Barber.id == barber_id).with_for_update(key_share=True))
+
+
+# Service to reject a booking that overlaps another one of the same barber
+def ensure_slot_is_free(barber_id, start, duration=None, exclude_id=None):
+    end = appointment_end_time(start, duration)
+    lock_barber_schedule(barber_id)
+    if find_conflicting_appointment(barber_id, start, end, exclude_id) is not None:
+        raise BookingConflict()
+    return end
+
+
+# Service to check an appointment's current barber, time and duration for overlaps
+def ensure_appointment_is_free(appointment):
+    if appointment.status in INACTIVE_STATUSES:
+        return
+    ensure_slot_is_free(appointment.barber_id, appointment.appointment_time, appointment.duration,
+                        exclude_id=appointment.id)
+
+
+# Service to retrieve all appointments, serialized from column rows; streamed as JSON chunks if requested
+def get_all_appointments(stream=False, page=None, fields=None):
+    spec = APPOINTMENT_COLUMNS.only(fields, page)
+    stmt = paginate(spec.select(), page, Appointment.created_at, Appointment.id)
+    if stream:
+        return spec.stream_json(stmt)
+    return spec.fetch(stmt)
+
+
+# Service to list appointments matching ``criteria``, narrowed to the requested fields
+def _list_appointments(criteria, page=None, fields=None, order_column=Appointment.created_at):
+    spec = APPOINTMENT_COLUMNS.only(fields, page)
+    # Ordered whether or not a page was requested, so unpaged lists come back in order too
+    stmt = spec.select().where(*criteria).order_by(order_column, Appointment.id)
+    if page is not None:
+        stmt = page.apply(stmt, order_column, Appointment.id)
+    return spec.fetch(stmt)
+
+
+def _parse_bound(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or datetime.")
+
+
+# Service to turn from/to/status query arguments into appointment criteria
+def window_criteria(date_from=None, date_to=None, status=None):
+    """
+    Criteria for appointments starting in [from, to] with one of the
+    comma-separated statuses. A bare date as ``to`` covers that whole day.
+    Both bounds are on appointment_time, so the (client_id | barber_id,
+    appointment_time) indexes answer them with a range scan.
+    """
+    criteria = []
+    start = end = None
+    if date_from:
+        start = _parse_bound(date_from, 'from')
+        criteria.append(Appointment.appointment_time >= start)
+    if date_to:
+        end = _parse_bound(date_to, 'to')
+        if 'T' not in date_to and ' ' not in date_to:
+            criteria.append(Appointment.appointment_time < end + timedelta(days=1))
+        else:
+            criteria.append(Appointment.appointment_time <= end)
+    if start is not None and end is not None and end < start:
+        raise ValueError("'to' must not be before 'from'.")
+    if status:
+        statuses = [value.strip() for value in status.split(',') if value.strip()]
+        unknown = [value for value in statuses if value not in APPOINTMENT_STATUSES]
+        if unknown:
+            raise ValueError(f"Unknown status: {', '.join(unknown)}")
+        criteria.append(Appointment.status.in_(statuses))
+    return criteria
 
 
 # Service to create an appointment with validation for overlapping appointments
 def create_appointment(data):
     appointment_time = datetime.strptime(data.get('appointment_time'), "%Y-%m-%dT%H:%M:%S.%f")
+    duration = validate_duration(data.get('duration'))
 
     # Prevent overlapping appointments
-    overlapping_appointments = Appointment.query.filter(
-        Appointment.barber_id == data.get('barber_id'),
-        Appointment.appointment_time == appointment_time
-    ).first()
-
-    if overlapping_appointments:
-        raise ValueError("The barber is already booked at this time.")
+    ensure_slot_is_free(data.get('barber_id'), appointment_time, duration)
 
     appointment = Appointment(
         client_id=data.get('client_id'),
         barber_id=data.get('barber_id'),
         service_id=data.get('service_id'),
         appointment_time=appointment_time,
-        duration=data.get('duration', 30),  # Default duration of 30 mins
+        duration=duration,
         created_at=datetime.now()
     )
     db.session.add(appointment)
-    db.session.commit()
+    commit_booking()
+    publish_appointment_events('created', [appointment.id])
     return appointment
 
 
+# Service to validate one item of a batch booking into Appointment keyword arguments
+def _parse_batch_item(item):
+    if not isinstance(item, dict):
+        raise ValueError("Each appointment must be an object.")
+    missing = [key for key in ('client_id', 'barber_id', 'service_id', 'appointment_time') if item.get(key) is None]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    try:
+        ids = {key: int(item[key]) for key in ('client_id', 'barber_id', 'service_id')}
+    except (TypeError, ValueError):
+        raise ValueError("client_id, barber_id and service_id must be integers.")
+    try:
+        start = datetime.fromisoformat(item['appointment_time'])
+    except (TypeError, ValueError):
+        raise ValueError("appointment_time must be an ISO 8601 datetime.")
+    duration = validate_duration(item.get('duration'))
+    return {
+        **ids,
+        'appointment_time': start,
+        'duration': duration,
+        'end_time': start + timedelta(minutes=duration),
+    }
+
+
+def _missing_references(bookings):
+    """The client, barber and service ids referenced by ``bookings`` that do not exist, read in one query."""
+    requested = {
+        name: {booking[f'{name}_id'] for _, booking in bookings}
+        for name in ('client', 'barber', 'service')
+    }
+    found = {name: set() for name in requested}
+    stmt = union_all(*[
+        select(literal(name), model.id).where(model.id.in_(requested[name]))
+        for name, model in (('client', Client), ('barber', Barber), ('service', Service))
+    ])
+    for name, id_ in db.session.execute(stmt):
+        found[name].add(id_)
+    return {name: requested[name] - found[name] for name in requested}
+
+
+def _overlaps(intervals, start, end):
+    """Whether [start, end) overlaps any interval of a start-sorted list."""
+    # Only intervals starting before ``end`` can overlap; the longest one
+    # allowed bounds how far back to look
+    horizon = start - timedelta(minutes=Config.MAX_APPOINTMENT_DURATION)
+    index = bisect_left(intervals, (end,))
+    while index > 0:
+        index -= 1
+        other_start, other_end = intervals[index]
+        if other_start <= horizon:
+            return False
+        if other_end > start:
+            return True
+    return False
+
+
+# Service to book many appointments in one transaction with per-item results
+def create_appointments(items):
+    """
+    Book every valid, non-overlapping item of ``items`` in a single commit.
+
+    Conflicts with existing appointments are found with one query covering
+    every requested slot; conflicts inside the batch are resolved in order,
+    so an item loses to an earlier item for the same barber and time.
+    Returns one result per item, in order.
+    """
+    if len(items) > Config.MAX_BATCH_APPOINTMENTS:
+        raise ValueError(f"A batch cannot hold more than {Config.MAX_BATCH_APPOINTMENTS} appointments.")
+
+    results = [None] * len(items)
+    bookings = []
+    for index, item in enumerate(items):
+        try:
+            bookings.append((index, _parse_batch_item(item)))
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 400, 'error': str(e)}
+
+    if bookings:
+        # Unknown ids are per-item errors here rather than a foreign-key failure of the whole flush
+        missing = _missing_references(bookings)
+        valid = []
+        for index, booking in bookings:
+            unknown = [f"{name} {booking[f'{name}_id']}" for name in ('client', 'barber', 'service')
+                       if booking[f'{name}_id'] in missing[name]]
+            if unknown:
+                results[index] = {'index': index, 'status': 400, 'error': f"Not found: {', '.join(unknown)}"}
+            else:
+                valid.append((index, booking))
+        bookings = valid
+
+    if bookings:
+        # Sorted, so two batches touching the same barbers cannot deadlock
+        for barber_id in sorted({booking['barber_id'] for _, booking in bookings}):
+            lock_barber_schedule(barber_id)
+
+        schedules = {}
+        existing = db.session.execute(
+            select(Appointment.barber_id, Appointment.appointment_time, Appointment.end_time).where(or_(*[
+                _overlapping(booking['barber_id'], booking['appointment_time'], booking['end_time'])
+                for _, booking in bookings
+            ]))
+        )
+        for barber_id, start, end in existing:
+            insort(schedules.setdefault(barber_id, []), (start, end))
+
+        accepted = []
+        for index, booking in bookings:
+            schedule = schedules.setdefault(booking['barber_id'], [])
+            if _overlaps(schedule, booking['appointment_time'], booking['end_time']):
+                results[index] = {'index': index, 'status': 409, 'error': str(BookingConflict())}
+                continue
+            insort(schedule, (booking['appointment_time'], booking['end_time']))
+            appointment = Appointment(created_at=datetime.now(), **booking)
+            accepted.append((index, appointment))
+
+        if accepted:
+            db.session.add_all([appointment for _, appointment in accepted])
+            # Where the overlap constraint is not deferred it fires here, not at commit
+            with booking_errors():
+                db.session.flush()
+            # Read the ids before the commit expires the instances
+            ids = [(index, appointment.id) for index, appointment in accepted]
+            commit_booking()
+            created = {row['id']: row for row in APPOINTMENT_COLUMNS.fetch(
+                APPOINTMENT_COLUMNS.select().where(Appointment.id.in_([id_ for _, id_ in ids]))
+            )}
+            for index, appointment_id in ids:
+                results[index] = {'index': index, 'status': 201, 'appointment': created[appointment_id]}
+            if has_listeners():
+                _publish('created', list(created.values()))
+        else:
+            db.session.rollback()
+
+    return results
+
+
 # Service to update appointment status
 def update_appointment_status(appointment_id, status):
     appointment = get_appointment_by_id(appointment_id)
     if appointment:
         appointment.status = status
         appointment.updated_at = datetime.now()
-        db.session.commit()
+        # Re-activating a cancelled appointment must not double-book its slot
+        with db.session.no_autoflush:
+            ensure_appointment_is_free(appointment)
+        commit_booking()
+        publish_appointment_events('status', [appointment_id])
     return appointment
 
 
-# Service to retrieve all upcoming appointments for a barber
-def get_upcoming_appointments_for_barber(barber_id):
+# Service to retrieve upcoming appointments for a barber, up to ``date_to`` when given
+def get_upcoming_appointments_for_barber(barber_id, page=None, fields=None, date_to=None, status=None):
     now = datetime.now()
-    return Appointment.query.filter(
+    return _list_appointments([
         Appointment.barber_id == barber_id,
-        Appointment.appointment_time > now
-    ).all()
+        Appointment.appointment_time > now,
+        *window_criteria(date_to=date_to, status=status)
+    ], page, fields, Appointment.appointment_time)
+
+
+# Service to retrieve appointments for a client; a from/to window orders them by time
+def get_appointments_for_client(client_id, page=None, fields=None, date_from=None, date_to=None, status=None):
+    criteria = window_criteria(date_from, date_to, status)
+    order_column = Appointment.appointment_time if date_from or date_to else Appointment.created_at
+    return _list_appointments([Appointment.client_id == client_id, *criteria], page, fields, order_column)
+
+
+# Service to retrieve appointments for a barber; a from/to window orders them by time
+def get_appointments_for_barber(barber_id, page=None, fields=None, date_from=None, date_to=None, status=None):
+    criteria = window_criteria(date_from, date_to, status)
+    order_column = Appointment.appointment_time if date_from or date_to else Appointment.created_at
+    return _list_appointments([Appointment.barber_id == barber_id, *criteria], page, fields, order_column)
 
 # Service to get appointment by ID
 def get_appointment_by_id(appointment_id):
     return Appointment.query.get_or_404(appointment_id)
 
+# Service to get appointment by ID, serialized with the requested fields only
+def get_appointment_record(appointment_id, fields=None):
+    spec = APPOINTMENT_COLUMNS.only(fields)
+    return spec.fetch_one(spec.select().where(Appointment.id == appointment_id))
+
 # Service to update an appointment
 def update_appointment(appointment_id, data):
     appointment = get_appointment_by_id(appointment_id)
+    previous_barber_id = appointment.barber_id
     if 'client_name' in data:
         appointment.client_name = data['client_name']
     if 'barber_id' in data:
@@ -66,12 +449,20 @@ def update_appointment(appointment_id, data):
         appointment.service_id = data['service_id']
     if 'appointment_time' in data:
         appointment.appointment_time = datetime.strptime(data['appointment_time'], "%Y-%m-%dT%H:%M:%S")
-    db.session.commit()
+    if 'duration' in data:
+        appointment.duration = validate_duration(data['duration'])
+    with db.session.no_autoflush:
+        ensure_appointment_is_free(appointment)
+    commit_booking()
+    moved = previous_barber_id if appointment.barber_id != previous_barber_id else None
+    publish_appointment_events('updated', [appointment_id], moved)
     return appointment
 
 # Service to delete an appointment
 def delete_appointment(appointment_id):
     appointment = get_appointment_by_id(appointment_id)
+    barber_id = appointment.barber_id
     db.session.delete(appointment)
     db.session.commit()
+    publish_appointment_deleted(appointment_id, barber_id)
     return appointment
@@ -0,0 +1,145 @@
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import and_, select
+from app import db
+from config import Config
+from models import Appointment, Barber
+from services.appointment_services import INACTIVE_STATUSES, validate_duration
+
+# Free-slot finder. The whole range is laid out as one timeline of
+# SLOT_MINUTES steps starting at midnight of the first day, and each barber's
+# schedule becomes a Python int used as a bitmap over it: bit i is the slot
+# starting at origin + i * step. Busy time, opening hours and "fits the
+# requested duration" are then a handful of shifts and ANDs per barber.
+
+
+def _parse_time(value):
+    hours, minutes = value.split(':')
+    return time(int(hours), int(minutes))
+
+
+def parse_range(date_from=None, date_to=None):
+    """The [from, to] date range of a request, defaulting to a week from today."""
+    try:
+        first = date.fromisoformat(date_from) if date_from else date.today()
+        last = date.fromisoformat(date_to) if date_to else first + timedelta(days=6)
+    except ValueError:
+        raise ValueError("Dates must be formatted as YYYY-MM-DD.")
+    if last < first:
+        raise ValueError("'to' must not be before 'from'.")
+    if (last - first).days + 1 > Config.MAX_AVAILABILITY_DAYS:
+        raise ValueError(f"The range cannot exceed {Config.MAX_AVAILABILITY_DAYS} days.")
+    return first, last
+
+
+def _slot_range(origin, step, start, end):
+    """Indexes [first, last) of the slots touched by [start, end)."""
+    first = (start - origin) // step
+    last = -((origin - end) // step)
+    return first, last
+
+
+def _open_mask(origin, days, step, now):
+    """Bits of the slots that lie inside opening hours and are not in the past."""
+    per_day = timedelta(days=1) // step
+    # Slots that start at or after opening and end by closing
+    _, opens = _slot_range(origin, step, origin, datetime.combine(origin, _parse_time(Config.OPENING_TIME)))
+    closes = (datetime.combine(origin, _parse_time(Config.CLOSING_TIME)) - origin) // step
+    day_mask = ((1 << max(closes - opens, 0)) - 1) << opens
+    mask = 0
+    for offset in range(days):
+        if (origin + timedelta(days=offset)).weekday() in Config.OPEN_WEEKDAYS:
+            mask |= day_mask << (offset * per_day)
+    if now > origin:
+        _, past = _slot_range(origin, step, origin, now)
+        mask &= ~((1 << past) - 1)
+    return mask
+
+
+def _free_starts(free, slots_needed):
+    """Bits of the slots where ``slots_needed`` consecutive free slots begin."""
+    starts = free
+    for shift in range(1, slots_needed):
+        starts &= free >> shift
+    return starts
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _load_schedules(criteria, start, end):
+    """
+    Every barber matching ``criteria`` with the active appointments that
+    overlap [start, end): one LEFT JOIN query riding the
+    (barber_id, appointment_time, end_time) index.
+    """
+    stmt = select(Barber.id, Barber.available, Appointment.appointment_time, Appointment.end_time).outerjoin(
+        Appointment, and_(
+            Appointment.barber_id == Barber.id,
+            Appointment.appointment_time > start - timedelta(minutes=Config.MAX_APPOINTMENT_DURATION),
+            Appointment.appointment_time < end,
+            Appointment.end_time > start,
+            Appointment.status.notin_(INACTIVE_STATUSES)
+        )
+    ).where(*criteria).order_by(Barber.id)
+
+    schedules = {}
+    for barber_id, available, appointment_start, appointment_end in db.session.execute(stmt):
+        available, busy = schedules.setdefault(barber_id, (available, []))
+        if appointment_start is not None:
+            busy.append((appointment_start, appointment_end))
+    return schedules
+
+
+def find_free_slots(criteria, date_from=None, date_to=None, duration=None, now=None):
+    first_day, last_day = parse_range(date_from, date_to)
+    duration = validate_duration(duration)
+
+    step = timedelta(minutes=Config.SLOT_MINUTES)
+    days = (last_day - first_day).days + 1
+    origin = datetime.combine(first_day, time())
+    end = origin + timedelta(days=days)
+    total = timedelta(days=days) // step
+    slots_needed = -(-duration // Config.SLOT_MINUTES)
+    open_mask = _open_mask(origin, days, step, now or datetime.now())
+
+    barbers = []
+    for barber_id, (available, appointments) in _load_schedules(criteria, origin, end).items():
+        slots = []
+        if available:
+            busy = 0
+            for appointment_start, appointment_end in appointments:
+                first, last = _slot_range(origin, step, appointment_start, appointment_end)
+                first, last = max(first, 0), min(last, total)
+                if last > first:
+                    busy |= ((1 << (last - first)) - 1) << first
+            starts = _free_starts(open_mask & ~busy, slots_needed)
+            slots = [(origin + index * step).isoformat() for index in _bits(starts)]
+        barbers.append({'barber_id': barber_id, 'available': bool(available), 'slots': slots})
+
+    return {
+        'from': first_day.isoformat(),
+        'to': last_day.isoformat(),
+        'duration': duration,
+        'barbers': barbers
+    }
+
+
+# Free slots of one barber
+def get_free_slots_for_barber(barber_id, date_from=None, date_to=None, duration=None):
+    result = find_free_slots([Barber.id == barber_id], date_from, date_to, duration)
+    if not result['barbers']:
+        return None
+    barber = result.pop('barbers')[0]
+    result.update(barber)
+    return result
+
+
+# Free slots of every barber in a barbershop
+def get_free_slots_for_barbershop(barbershop_id, date_from=None, date_to=None, duration=None):
+    result = find_free_slots([Barber.barbershop_id == barbershop_id], date_from, date_to, duration)
+    result['barbershop_id'] = barbershop_id
+    return result
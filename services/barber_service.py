@@ -1,14 +1,42 @@
-from models import Barber
+from models import Barber, Review
+from sqlalchemy import Float, case, cast, select
 from app import db
+from config import Config
+from services.review_service import REVIEW_COLUMNS, get_reviews_by_barber_id
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
+
+# Columns of Barber.to_dict(): the rating summary plus the EMBEDDED_REVIEWS most
+# recent reviews of each barber, loaded only when ?fields= keeps them
+BARBER_COLUMNS = ColumnSpec(Barber, [
+    ('id', Barber.id),
+    ('uid', Barber.uid),
+    ('name', Barber.name),
+    ('barbershop_id', Barber.barbershop_id),
+    ('available', Barber.available),
+    ('photo_url', Barber.photo_url),
+    ('review_count', Barber.review_count),
+    ('average_rating', case((Barber.review_count > 0, cast(Barber.rating_sum, Float) / Barber.review_count),
+                            else_=0)),
+    ('created_at', Barber.created_at),
+    ('updated_at', Barber.updated_at),
+], nested=[('reviews', REVIEW_COLUMNS, Review.barber_id, Config.EMBEDDED_REVIEWS,
+             (Review.created_at.desc(), Review.id.desc()))])
 
 # Get all barbers
-def get_all_barbers():
-    return Barber.query.all()
+def get_all_barbers(page=None, fields=None):
+    spec = BARBER_COLUMNS.only(fields, page)
+    return spec.fetch(paginate(spec.select(), page, Barber.created_at, Barber.id))
 
 # Get a barber by ID
 def get_barber_by_id(barber_id):
     return Barber.query.get(barber_id)
 
+# Get a barber by ID, serialized with the requested fields only
+def get_barber_record(barber_id, fields=None):
+    spec = BARBER_COLUMNS.only(fields)
+    return spec.fetch_one(spec.select().where(Barber.id == barber_id))
+
 # Create a new barber
 def create_barber(name, barbershop_id, photo_url=None):
     new_barber = Barber(name=name, barbershop_id=barbershop_id, photo_url=photo_url)
@@ -45,18 +73,29 @@ def delete_barber(barber_id):
     return False
 
 # Get all barbers in a particular barbershop
-def get_barbers_by_barbershop(barbershop_id):
-    return Barber.query.filter_by(barbershop_id=barbershop_id).all()
+def get_barbers_by_barbershop(barbershop_id, page=None, fields=None):
+    spec = BARBER_COLUMNS.only(fields, page)
+    stmt = spec.select().where(Barber.barbershop_id == barbershop_id)
+    return spec.fetch(paginate(stmt, page, Barber.created_at, Barber.id))
+
+# Rows a barbershop's barber list is built from, reviews included, for conditional GETs
+def barbershop_barbers_scopes(barbershop_id):
+    barber_ids = select(Barber.id).where(Barber.barbershop_id == barbershop_id)
+    return [
+        (Barber, Barber.barbershop_id == barbershop_id),
+        (Review, Review.barber_id.in_(barber_ids)),
+    ]
 
 # Get all barbers by their availability status
 def get_barbers_by_availability(available):
-    return Barber.query.filter_by(available=available).all()
+    return BARBER_COLUMNS.fetch(BARBER_COLUMNS.select().where(Barber.available == available).order_by(Barber.id))
 
-# Get all reviews for a specific barber
-def get_reviews_for_barber(barber_id):
-    barber = Barber.query.get(barber_id)
-    return barber.reviews if barber else []
+# Get a barber's reviews, a page at a time when one is requested
+def get_reviews_for_barber(barber_id, page=None):
+    return get_reviews_by_barber_id(barber_id, page)
 
 # Search barbers by their name (case insensitive search)
 def search_barbers_by_name(name):
-    return Barber.query.filter(Barber.name.ilike(f'%{name}%')).all()
\ No newline at end of file
+    return BARBER_COLUMNS.fetch(
+        BARBER_COLUMNS.select().where(Barber.name.ilike(f'%{name}%')).order_by(Barber.id)
+    )
\ No newline at end of file
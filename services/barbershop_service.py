@@ -1,5 +1,21 @@
-from models import Barbershop, Barber, Service, Review, Payment
+from models import Barbershop, Barber, Service, Payment
 from app import db
+from services.loader_profiles import BARBERSHOP_LIST
+from services.review_service import create_review as create_barber_review
+from services.service_service import SERVICE_COLUMNS
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
+
+# Columns of Barbershop.to_dict(); services are only loaded when ?fields= keeps them
+BARBERSHOP_COLUMNS = ColumnSpec(Barbershop, [
+    ('id', Barbershop.id),
+    ('name', Barbershop.name),
+    ('admin_id', Barbershop.admin_id),
+    ('location', Barbershop.location),
+    ('photo_url', Barbershop.photo_url),
+    ('created_at', Barbershop.created_at),
+    ('updated_at', Barbershop.updated_at),
+], nested=[('services', SERVICE_COLUMNS, Service.barbershop_id)])
 
 # Updated function to use admin_id instead of owner_id
 def create_barbershop(admin_id, name, location):  # Changed owner_id to admin_id
@@ -30,12 +46,9 @@ def schedule_barber(barber_id, available):
         db.session.commit()
     return barber
 
-# Function to create a review for a barber
+# Function to create a review for a barber; review_service keeps the barber's rating totals in step
 def create_review(barber_id, rating, comment):
-    review = Review(barber_id=barber_id, rating=rating, comment=comment)
-    db.session.add(review)
-    db.session.commit()
-    return review
+    return create_barber_review(rating, comment, barber_id)
 
 # Updated function to use admin_id instead of owner_id
 def check_payment_status(admin_id):  # Changed owner_id to admin_id
@@ -45,26 +58,34 @@ def check_payment_status(admin_id):  # Changed owner_id to admin_id
     return 'No Payment Found'
 
 # Service to retrieve all barbershops
-def get_all_barbershops():
+def get_all_barbershops(page=None, fields=None):
     """
     Retrieve all barbershops from the database
     """
-    return Barbershop.query.all()
+    spec = BARBERSHOP_COLUMNS.only(fields, page)
+    return spec.fetch(paginate(spec.select(), page, Barbershop.created_at, Barbershop.id))
 
 # Service to retrieve a barbershop by ID
-def get_barbershop_by_id(barbershop_id):
+def get_barbershop_by_id(barbershop_id, options=BARBERSHOP_LIST):
     """
     Retrieve a specific barbershop by its ID
     """
-    return Barbershop.query.get_or_404(barbershop_id)
+    return Barbershop.query.options(*options).get_or_404(barbershop_id)
 
-# Service to retrieve all barbers associated with a barbershop
-def get_barbers_by_barbershop(barbershop_id):
+# Rows a barbershop's representation is built from, for conditional GETs
+def barbershop_scopes(barbershop_id):
+    return [
+        (Barbershop, Barbershop.id == barbershop_id),
+        (Service, Service.barbershop_id == barbershop_id),
+    ]
+
+# Service to retrieve a barbershop by ID with only the requested fields
+def get_barbershop_record(barbershop_id, fields=None):
     """
-    Retrieve all barbers associated with a specific barbershop
+    Retrieve a specific barbershop by its ID, serialized from column rows
     """
-    barbershop = get_barbershop_by_id(barbershop_id)
-    return barbershop.barbers
+    spec = BARBERSHOP_COLUMNS.only(fields)
+    return spec.fetch_one(spec.select().where(Barbershop.id == barbershop_id))
 
 # Service to retrieve all services provided by a barbershop
 def get_services_by_barbershop(barbershop_id):
@@ -75,10 +96,11 @@ def get_services_by_barbershop(barbershop_id):
     return barbershop.services
 
 # Search barbershops by name or location
-def search_barbershops(query):
-    return Barbershop.query.filter(
+def search_barbershops(query, fields=None):
+    spec = BARBERSHOP_COLUMNS.only(fields)
+    return spec.fetch(spec.select().where(
         (Barbershop.name.ilike(f'%{query}%')) | (Barbershop.location.ilike(f'%{query}%'))
-    ).all()
+    ))
 
 # Update barbershop details
 def update_barbershop(barbershop_id, data):
@@ -102,13 +124,6 @@ def delete_barbershop(barbershop_id):
         return True
     return False
 
-# List all barbers for a barbershop
-def list_barbers_for_barbershop(barbershop_id):
-    barbershop = Barbershop.query.get(barbershop_id)
-    if barbershop:
-        return barbershop.barbers
-    return []
-
 # List all services for a barbershop
 def list_services_for_barbershop(barbershop_id):
     barbershop = Barbershop.query.get(barbershop_id)
@@ -1,10 +1,14 @@
 from models import Barbershop, Review, Appointment, Service, Client
 from app import db
 from datetime import datetime
+from services.appointment_services import ensure_slot_is_free, ensure_appointment_is_free, commit_booking, \
+    publish_appointment_events
+from services.review_service import move_review_rating
+from utils.pagination import paginate
 
 # Client Services
-def get_barbershops():
-    return Barbershop.query.all()
+def get_barbershops(page=None):
+    return paginate(Barbershop.query, page, Barbershop.created_at, Barbershop.id).all()
 
 def get_barbershop_details(barbershop_id):
     return Barbershop.query.get(barbershop_id)
@@ -18,36 +22,46 @@ def create_barbershop_review(barbershop_id, rating, comment):
 def create_barber_review(barber_id, rating, comment):
     review = Review(barber_id=barber_id, rating=rating, comment=comment)
     db.session.add(review)
+    move_review_rating(None, (barber_id, rating))
     db.session.commit()
     return review
 
 def create_appointment(client_id, barber_id, service_id, appointment_time):
+    appointment_time = datetime.strptime(appointment_time, "%Y-%m-%d %H:%M:%S")
+    ensure_slot_is_free(barber_id, appointment_time)
     appointment = Appointment(
         client_id=client_id,
         barber_id=barber_id,
         service_id=service_id,
-        appointment_time=datetime.strptime(appointment_time, "%Y-%m-%d %H:%M:%S"),
+        appointment_time=appointment_time,
         created_at=datetime.now()
     )
     db.session.add(appointment)
-    db.session.commit()
+    commit_booking()
+    publish_appointment_events('created', [appointment.id])
     return appointment
 
 
 def update_appointment(appointment_id, barber_id=None, service_id=None, appointment_time=None):
     appointment = Appointment.query.get(appointment_id)
     if appointment:
+        previous_barber_id = appointment.barber_id
         if barber_id is not None:
             appointment.barber_id = barber_id
         if service_id is not None:
             appointment.service_id = service_id
         if appointment_time is not None:
             appointment.appointment_time = datetime.strptime(appointment_time, "%Y-%m-%d %H:%M:%S")
-        db.session.commit()
+        with db.session.no_autoflush:
+            ensure_appointment_is_free(appointment)
+        commit_booking()
+        moved = previous_barber_id if appointment.barber_id != previous_barber_id else None
+        publish_appointment_events('updated', [appointment_id], moved)
     return appointment
 
-def get_services_by_barbershop(barbershop_id):
-    return Service.query.filter_by(barbershop_id=barbershop_id).all()
+def get_services_by_barbershop(barbershop_id, page=None):
+    query = Service.query.filter_by(barbershop_id=barbershop_id)
+    return paginate(query, page, Service.created_at, Service.id).all()
 
 def create_client(data):
     client = Client(
@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from app import db
+from config import Config
+from models import Appointment, Barber, Sale
+from services.appointment_services import publish_appointment_events
+
+# End-of-day close-out: appointments still 'Scheduled' after they ended become
+# 'Completed' when the client paid at the barber's shop that day (a Sale
+# exists) and 'No-show' otherwise. Rows are claimed in (end_time, id) order
+# through ix_appointments_status_end_time_id and closed with set-based UPDATEs,
+# one commit per chunk. Closed rows leave the 'Scheduled' state, so an
+# interrupted run simply resumes where it stopped when started again.
+
+
+def _next_chunk(cutoff, batch_size):
+    stmt = select(
+        Appointment.id, Appointment.client_id, Appointment.appointment_time, Barber.barbershop_id
+    ).join(Barber, Appointment.barber_id == Barber.id).where(
+        Appointment.status == 'Scheduled',
+        Appointment.end_time < cutoff
+    ).order_by(Appointment.end_time, Appointment.id).limit(batch_size)
+    return db.session.execute(stmt).all()
+
+
+def _paid_visits(chunk):
+    """(client_id, barbershop_id, day) of every sale made to the chunk's clients on its days."""
+    first_day = min(row.appointment_time for row in chunk).date()
+    last_day = max(row.appointment_time for row in chunk).date()
+    stmt = select(Sale.client_id, Sale.barbershop_id, Sale.created_at).where(
+        Sale.client_id.in_({row.client_id for row in chunk}),
+        Sale.created_at >= datetime.combine(first_day, datetime.min.time()),
+        Sale.created_at < datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    )
+    return {(client_id, barbershop_id, created_at.date())
+            for client_id, barbershop_id, created_at in db.session.execute(stmt)}
+
+
+def _set_status(ids, status, now):
+    if not ids:
+        return 0
+    # Re-checking the status skips rows changed since the chunk was read
+    result = db.session.execute(
+        update(Appointment).where(Appointment.id.in_(ids), Appointment.status == 'Scheduled')
+        .values(status=status, updated_at=now).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# Service to close out every appointment that ended before ``cutoff``
+def close_out_appointments(cutoff=None, batch_size=None, max_batches=None, progress=None):
+    """
+    Move past 'Scheduled' appointments to 'Completed' or 'No-show' in chunks
+    of ``batch_size`` rows, committing after each chunk. ``cutoff`` defaults
+    to CLOSEOUT_GRACE_MINUTES ago; ``progress`` is called with the running
+    totals after every chunk.
+    """
+    batch_size = Config.CLOSEOUT_BATCH_SIZE if batch_size is None else batch_size
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1.")
+    cutoff = cutoff or datetime.now() - timedelta(minutes=Config.CLOSEOUT_GRACE_MINUTES)
+
+    totals = {'batches': 0, 'completed': 0, 'no_show': 0, 'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+    started = time.perf_counter()
+    while max_batches is None or totals['batches'] < max_batches:
+        chunk = _next_chunk(cutoff, batch_size)
+        if not chunk:
+            break
+        paid = _paid_visits(chunk)
+        completed, no_show = [], []
+        for row in chunk:
+            visit = (row.client_id, row.barbershop_id, row.appointment_time.date())
+            (completed if visit in paid else no_show).append(row.id)
+
+        now = datetime.now()
+        totals['completed'] += _set_status(completed, 'Completed', now)
+        totals['no_show'] += _set_status(no_show, 'No-show', now)
+        db.session.commit()
+        publish_appointment_events('status', completed + no_show)
+
+        totals['batches'] += 1
+        totals['rows'] = totals['completed'] + totals['no_show']
+        totals['seconds'] = time.perf_counter() - started
+        totals['rows_per_second'] = totals['rows'] / totals['seconds'] if totals['seconds'] else 0.0
+        if progress:
+            progress(totals)
+        if len(chunk) < batch_size:
+            break
+    return totals
+
+
+@click.command('close-appointments')
+@click.option('--batch-size', type=int, default=None,
+              help='Rows per chunk and commit (default CLOSEOUT_BATCH_SIZE).')
+@click.option('--before', 'cutoff', type=click.DateTime(), default=None,
+              help='Close appointments that ended before this time (default CLOSEOUT_GRACE_MINUTES ago).')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many chunks.')
+@with_appcontext
+def close_out_command(batch_size, cutoff, max_batches):
+    """Mark past scheduled appointments as Completed or No-show."""
+    def report(totals):
+        click.echo(f"batch {totals['batches']}: {totals['completed']} completed, {totals['no_show']} no-show, "
+                   f"{totals['rows_per_second']:.0f} rows/s")
+
+    try:
+        totals = close_out_appointments(cutoff, batch_size, max_batches, progress=report)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--batch-size')
+    click.echo(f"Closed {totals['rows']} appointments ({totals['completed']} completed, "
+               f"{totals['no_show']} no-show) in {totals['seconds']:.2f}s, "
+               f"{totals['rows_per_second']:.0f} rows/s")
@@ -1,6 +1,20 @@
 from app import db
-from models import Invoice
+from models import Invoice, Client
 from datetime import datetime
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
+
+# Columns of Invoice.to_dict(), selected directly for list endpoints
+INVOICE_COLUMNS = ColumnSpec(Invoice, [
+    ('id', Invoice.id),
+    ('client_id', Invoice.client_id),
+    ('client_name', Client.name),
+    ('barbershop_id', Invoice.barbershop_id),
+    ('amount', Invoice.amount),
+    ('status', Invoice.status),
+    ('created_at', Invoice.created_at),
+    ('paid_at', Invoice.paid_at),
+], joins=[(Client, Invoice.client_id == Client.id)])
 
 # Function to create a new invoice
 def create_invoice(data):
@@ -19,9 +33,18 @@ def create_invoice(data):
 def get_invoice_by_id(invoice_id):
     return Invoice.query.get(invoice_id)
 
-# Function to get all invoices
-def get_all_invoices():
-    return Invoice.query.all()
+# Function to get an invoice by ID, serialized with the requested fields only
+def get_invoice_record(invoice_id, fields=None):
+    spec = INVOICE_COLUMNS.only(fields)
+    return spec.fetch_one(spec.select().where(Invoice.id == invoice_id))
+
+# Function to get all invoices, serialized from column rows; streamed as JSON chunks if requested
+def get_all_invoices(stream=False, page=None, fields=None):
+    spec = INVOICE_COLUMNS.only(fields, page)
+    stmt = paginate(spec.select(), page, Invoice.created_at, Invoice.id)
+    if stream:
+        return spec.stream_json(stmt)
+    return spec.fetch(stmt)
 
 # Function to update invoice details
 def update_invoice(invoice_id, data):
@@ -51,9 +74,13 @@ def delete_invoice(invoice_id):
     return False
 
 # Function to get all invoices for a specific client
-def get_invoices_for_client(client_id):
-    return Invoice.query.filter_by(client_id=client_id).all()
+def get_invoices_for_client(client_id, page=None, fields=None):
+    spec = INVOICE_COLUMNS.only(fields, page)
+    stmt = spec.select().where(Invoice.client_id == client_id)
+    return spec.fetch(paginate(stmt, page, Invoice.created_at, Invoice.id))
 
 # Function to get all invoices for a specific barbershop
-def get_invoices_for_barbershop(barbershop_id):
-    return Invoice.query.filter_by(barbershop_id=barbershop_id).all()
+def get_invoices_for_barbershop(barbershop_id, page=None, fields=None):
+    spec = INVOICE_COLUMNS.only(fields, page)
+    stmt = spec.select().where(Invoice.barbershop_id == barbershop_id)
+    return spec.fetch(paginate(stmt, page, Invoice.created_at, Invoice.id))
@@ -0,0 +1,10 @@
+from sqlalchemy.orm import selectinload
+from models import Barbershop
+
+# Relationship loading profiles for list endpoints. Each one preloads exactly
+# what the matching to_dict() walks, so a list costs a constant number of
+# queries no matter how many rows it returns. Barber, appointment and invoice
+# lists are served from their ColumnSpecs instead.
+
+# Barbershop.to_dict embeds every service
+BARBERSHOP_LIST = (selectinload(Barbershop.services),)
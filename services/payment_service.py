@@ -1,9 +1,26 @@
 from models import Payment, Sale, Invoice
 from app import db
 from datetime import datetime
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
 
-def get_all_payments():
-    return Payment.query.all()
+# Columns of Payment.to_dict(), selected directly for list endpoints
+PAYMENT_COLUMNS = ColumnSpec(Payment, [
+    ('id', Payment.id),
+    ('admin_id', Payment.admin_id),
+    ('amount', Payment.amount),
+    ('sale_id', Payment.sale_id),
+    ('invoice_id', Payment.invoice_id),
+    ('paid_at', Payment.paid_at),
+    ('status', Payment.status),
+    ('updated_at', Payment.updated_at),
+])
+
+def get_all_payments(stream=False, page=None):
+    stmt = paginate(PAYMENT_COLUMNS.select(), page, Payment.paid_at, Payment.id)
+    if stream:
+        return PAYMENT_COLUMNS.stream_json(stmt)
+    return PAYMENT_COLUMNS.fetch(stmt)
 
 def create_payment(data):
     invoice_id = data.get('invoice_id')
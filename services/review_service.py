@@ -1,16 +1,67 @@
-from sqlalchemy import func
+import time
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
 
-from models import Review
+from models import Barber, Review
 from app import db
+from config import Config
+from utils.cache import CommitInvalidatedCache
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
 
-# Get all reviews
-def get_reviews():
-    return Review.query.all()
+# Columns of Review.to_dict(), selected directly for list endpoints
+REVIEW_COLUMNS = ColumnSpec(Review, [
+    ('id', Review.id),
+    ('rating', Review.rating),
+    ('comment', Review.comment),
+    ('barber_id', Review.barber_id),
+    ('created_at', Review.created_at),
+    ('updated_at', Review.updated_at),
+])
+
+# Rating summaries of whole barbershops, by barbershop id. An entry is dropped
+# when a transaction that changed one of the shop's ratings or barbers commits.
+rating_cache = CommitInvalidatedCache('rating_shops', maxsize=Config.RATING_CACHE_SIZE, ttl=Config.RATING_CACHE_TTL)
+
+
+# Service to apply a change to a barber's running review totals, atomically in SQL
+def adjust_barber_rating(barber_id, count_delta, rating_delta):
+    if barber_id is None or (not count_delta and not rating_delta):
+        return
+    shops = db.session.execute(update(Barber).where(Barber.id == barber_id).values(
+        review_count=Barber.review_count + count_delta,
+        rating_sum=Barber.rating_sum + rating_delta
+    ).returning(Barber.barbershop_id).execution_options(synchronize_session=False)).scalars().all()
+    rating_cache.mark(db.session, shops)
+
+# Service to move a review's rating between barbers' totals; ``old``/``new`` are (barber_id, rating) or None
+def move_review_rating(old, new):
+    old = (old[0], int(old[1])) if old else None
+    new = (new[0], int(new[1])) if new else None
+    if old == new:
+        return
+    if old and new and old[0] == new[0]:
+        adjust_barber_rating(old[0], 0, new[1] - old[1])
+        return
+    if old:
+        adjust_barber_rating(old[0], -1, -old[1])
+    if new:
+        adjust_barber_rating(new[0], 1, new[1])
+
+# Get all reviews, serialized from column rows; streamed as JSON chunks if requested
+def get_reviews(stream=False, page=None):
+    stmt = paginate(REVIEW_COLUMNS.select(), page, Review.created_at, Review.id)
+    if stream:
+        return REVIEW_COLUMNS.stream_json(stmt)
+    return REVIEW_COLUMNS.fetch(stmt)
 
 # Create a review
 def create_review(rating, comment, barber_id):
     review = Review(rating=rating, comment=comment, barber_id=barber_id)
     db.session.add(review)
+    move_review_rating(None, (barber_id, rating))
     db.session.commit()
     return review
 
@@ -19,6 +70,7 @@ def update_review(review_id, rating=None, comment=None):
     review = Review.query.get(review_id)
     if review:
         if rating is not None:
+            move_review_rating((review.barber_id, review.rating), (review.barber_id, rating))
             review.rating = rating
         if comment is not None:
             review.comment = comment
@@ -29,18 +81,121 @@ def update_review(review_id, rating=None, comment=None):
 def delete_review(review_id):
     review = Review.query.get(review_id)
     if review:
+        move_review_rating((review.barber_id, review.rating), None)
         db.session.delete(review)
         db.session.commit()
         return True
     return False
 
-def get_reviews_by_barber_id(barber_id):
-    return Review.query.filter_by(barber_id=barber_id).all()
+def get_reviews_by_barber_id(barber_id, page=None):
+    query = Review.query.filter_by(barber_id=barber_id)
+    return paginate(query, page, Review.created_at, Review.id).all()
 
 def get_average_rating_for_barber(barber_id):
-    average = db.session.query(func.avg(Review.rating)).filter_by(barber_id=barber_id).scalar()
-    return average if average else 0
+    totals = db.session.execute(
+        select(Barber.review_count, Barber.rating_sum).where(Barber.id == barber_id)
+    ).first()
+    if not totals or not totals.review_count:
+        return 0
+    return totals.rating_sum / totals.review_count
+
+def _summaries(criteria):
+    """Count, average and star histogram per barber from one GROUP BY (barber, rating)."""
+    stmt = select(Barber.id, Review.rating, func.count(Review.id)).outerjoin(
+        Review, Review.barber_id == Barber.id
+    ).where(*criteria).group_by(Barber.id, Review.rating).order_by(Barber.id)
+
+    summaries = {}
+    for barber_id, rating, count in db.session.execute(stmt):
+        summary = summaries.setdefault(barber_id, {
+            'barber_id': barber_id, 'review_count': 0, 'average_rating': 0,
+            'histogram': {str(stars): 0 for stars in range(1, 6)}, 'rating_sum': 0
+        })
+        if rating is not None:
+            summary['histogram'][str(rating)] = count
+            summary['review_count'] += count
+            summary['rating_sum'] += rating * count
+    for summary in summaries.values():
+        total = summary.pop('rating_sum')
+        if summary['review_count']:
+            summary['average_rating'] = total / summary['review_count']
+    return list(summaries.values())
+
+# Rating summaries (count, average, histogram) for a list of barbers
+def get_rating_summaries_for_barbers(barber_ids):
+    return _summaries([Barber.id.in_(barber_ids)])
+
+# Rating summaries for every barber in a barbershop, cached until one of them changes
+def get_rating_summaries_for_barbershop(barbershop_id):
+    summaries = rating_cache.get(barbershop_id)
+    if summaries is None:
+        generation = rating_cache.generation
+        summaries = _summaries([Barber.barbershop_id == barbershop_id])
+        rating_cache.set_current(generation, barbershop_id, summaries)
+    return summaries
 
 def can_user_leave_review(user_id, barber_id):
     # Placeholder logic, you may need to check appointment history, etc.
     return True
+
+
+# Service to recompute every barber's review totals from the reviews table, in id-range chunks
+def recompute_barber_ratings(batch_size=1000):
+    """
+    Rewrite review_count and rating_sum where they disagree with the
+    reviews, one correlated UPDATE and commit per ``batch_size`` barber ids.
+    Returns how many barbers were checked and how many were repaired.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1.")
+    count = select(func.count(Review.id)).where(Review.barber_id == Barber.id).scalar_subquery()
+    total = select(func.coalesce(func.sum(Review.rating), 0)).where(Review.barber_id == Barber.id).scalar_subquery()
+    low, high = db.session.execute(select(func.min(Barber.id), func.max(Barber.id))).one()
+
+    result = {'checked': 0, 'repaired': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    start = low
+    while start is not None and start <= high:
+        in_range = (Barber.id >= start, Barber.id < start + batch_size)
+        result['checked'] += db.session.execute(select(func.count(Barber.id)).where(*in_range)).scalar()
+        repaired = db.session.execute(
+            update(Barber).where(*in_range, or_(Barber.review_count != count, Barber.rating_sum != total))
+            .values(review_count=count, rating_sum=total).execution_options(synchronize_session=False)
+        )
+        result['repaired'] += repaired.rowcount
+        db.session.commit()
+        start += batch_size
+    if result['repaired']:
+        rating_cache.invalidate()
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+@click.command('repair-ratings')
+@click.option('--batch-size', type=int, default=1000, help='Barber ids per UPDATE and commit.')
+@with_appcontext
+def repair_ratings_command(batch_size):
+    """Recompute barbers' review counts and rating sums from their reviews."""
+    try:
+        result = recompute_barber_ratings(batch_size)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--batch-size')
+    click.echo(f"Checked {result['checked']} barbers, repaired {result['repaired']} "
+               f"in {result['seconds']:.2f}s")
+
+
+# Per-shop invalidation: rating writes record their barber's shop (see
+# adjust_barber_rating), flushes record the shops of added, removed or moved
+# barbers, and rating_cache drops those shops' summaries on commit.
+
+@event.listens_for(Session, 'after_flush')
+def _mark_barber_shops(session, flush_context):
+    shops = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Barber):
+            shops.add(obj.barbershop_id)
+            shops.update(inspect(obj).attrs.barbershop_id.history.deleted)
+    shops.discard(None)
+    if shops:
+        rating_cache.mark(session, shops)
+
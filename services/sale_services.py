@@ -1,5 +1,71 @@
+import time
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app import db
-from models import Sale
+from models import Sale, SalesDailyRollup
+from services.analytics_service import bucket_cache
+from utils.columnar import ColumnSpec
+from utils.helpers import parse_day
+from utils.pagination import paginate
+
+# Columns of Sale.to_dict(), selected directly for list endpoints
+SALE_COLUMNS = ColumnSpec(Sale, [
+    ('id', Sale.id),
+    ('client_id', Sale.client_id),
+    ('barbershop_id', Sale.barbershop_id),
+    ('invoice_id', Sale.invoice_id),
+    ('amount', Sale.amount),
+    ('expense', Sale.expense),
+    ('profit', Sale.profit),
+    ('created_at', Sale.created_at),
+    ('updated_at', Sale.updated_at),
+])
+
+_ROLLUP_TOTALS = ('sale_count', 'amount', 'expense', 'profit')
+
+
+def sale_rollup_key(sale):
+    """What a sale contributes to sales_daily_rollup: ((barbershop_id, day), totals)."""
+    return (sale.barbershop_id, sale.created_at.date()), (1, sale.amount, sale.expense, sale.profit)
+
+
+# Service to give a sale without a created_at the day backfill_sale_created_at would, before its rollup key is taken
+def date_sale(sale):
+    if sale.created_at is None:
+        sale.created_at = sale.updated_at or datetime.now()
+    return sale
+
+
+def _add_to_rollup(key, totals):
+    barbershop_id, day = key
+    values = dict(zip(_ROLLUP_TOTALS, totals), barbershop_id=barbershop_id, day=day, updated_at=datetime.now())
+    dialect = db.session.get_bind().dialect.name
+    stmt = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(SalesDailyRollup).values(**values)
+    # Added in SQL so concurrent writers to the same shop and day do not lose updates
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[SalesDailyRollup.barbershop_id, SalesDailyRollup.day],
+        set_={**{name: getattr(SalesDailyRollup, name) + getattr(stmt.excluded, name) for name in _ROLLUP_TOTALS},
+              'updated_at': stmt.excluded.updated_at}
+    ))
+    bucket_cache.mark(db.session, [key])
+
+
+# Service to move a sale's contribution in the daily rollup; ``old``/``new`` come from sale_rollup_key or are None
+def apply_sale_to_rollup(old, new):
+    if old == new:
+        return
+    if old and new and old[0] == new[0]:
+        _add_to_rollup(new[0], [after - before for before, after in zip(old[1], new[1])])
+        return
+    if old:
+        _add_to_rollup(old[0], [-value for value in old[1]])
+    if new:
+        _add_to_rollup(*new)
+
 
 # Create a sale
 def create_sale(data):
@@ -10,7 +76,10 @@ def create_sale(data):
         amount=data.get('amount'),
         expense=data.get('expense')
     )
+    # Set now rather than at flush, so the rollup knows the sale's day
+    sale.created_at = datetime.now()
     db.session.add(sale)
+    apply_sale_to_rollup(None, sale_rollup_key(sale))
     db.session.commit()
     return sale
 
@@ -18,11 +87,13 @@ def create_sale(data):
 def update_sale(sale_id, data):
     sale = Sale.query.get(sale_id)
     if sale:
+        old = sale_rollup_key(date_sale(sale))
         if 'amount' in data:
             sale.amount = data['amount']
         if 'expense' in data:
             sale.expense = data['expense']
         sale.profit = sale.amount - sale.expense
+        apply_sale_to_rollup(old, sale_rollup_key(sale))
         db.session.commit()
     return sale
 
@@ -30,31 +101,78 @@ def update_sale(sale_id, data):
 def delete_sale(sale_id):
     sale = Sale.query.get(sale_id)
     if sale:
+        apply_sale_to_rollup(sale_rollup_key(date_sale(sale)), None)
         db.session.delete(sale)
         db.session.commit()
     return sale
 
-# Get total sales, expenses, and profit
-def get_total_sales():
-    total_sales = db.session.query(db.func.sum(Sale.amount)).scalar() or 0
-    total_expenses = db.session.query(db.func.sum(Sale.expense)).scalar() or 0
-    total_profit = db.session.query(db.func.sum(Sale.profit)).scalar() or 0
+
+def _rollup_totals(barbershop_id=None, date_from=None, date_to=None):
+    first, last = parse_day(date_from, 'from'), parse_day(date_to, 'to')
+    if first and last and last < first:
+        raise ValueError("'to' must not be before 'from'.")
+    stmt = select(*[func.coalesce(func.sum(getattr(SalesDailyRollup, name)), 0) for name in _ROLLUP_TOTALS])
+    if barbershop_id:
+        stmt = stmt.where(SalesDailyRollup.barbershop_id == barbershop_id)
+    if first:
+        stmt = stmt.where(SalesDailyRollup.day >= first)
+    if last:
+        stmt = stmt.where(SalesDailyRollup.day <= last)
+    return dict(zip(_ROLLUP_TOTALS, db.session.execute(stmt).one()))
+
+# Get total sales, expenses, and profit, optionally for one barbershop and/or a date range
+def get_total_sales(barbershop_id=None, date_from=None, date_to=None):
+    totals = _rollup_totals(barbershop_id, date_from, date_to)
     return {
-        'total_sales': total_sales,
-        'total_expenses': total_expenses,
-        'total_profit': total_profit
+        'total_sales': totals['amount'],
+        'total_expenses': totals['expense'],
+        'total_profit': totals['profit'],
+        'sale_count': totals['sale_count']
     }
 
-# Get average sale by barbershop, barber, or service
-def get_average_sale(barbershop_id=None, barber_id=None):
-    query = Sale.query
-    if barbershop_id:
-        query = query.filter(Sale.barbershop_id == barbershop_id)
-    if barber_id:
-        query = query.filter(Sale.barber_id == barber_id)
-    avg_sale = db.session.query(db.func.avg(Sale.amount)).scalar() or 0
-    return avg_sale
-
-# Service to get all sales
-def get_all_sales():
-    return Sale.query.all()
+# Get the average sale amount, optionally for one barbershop and/or a date range
+def get_average_sale(barbershop_id=None, date_from=None, date_to=None):
+    totals = _rollup_totals(barbershop_id, date_from, date_to)
+    return totals['amount'] / totals['sale_count'] if totals['sale_count'] else 0
+
+# Service to get all sales, serialized from column rows; streamed as JSON chunks if requested
+def get_all_sales(stream=False, page=None):
+    stmt = paginate(SALE_COLUMNS.select(), page, Sale.created_at, Sale.id)
+    if stream:
+        return SALE_COLUMNS.stream_json(stmt)
+    return SALE_COLUMNS.fetch(stmt)
+
+
+# Service to give sales without a created_at their updated_at (or now), so every sale has a day
+def backfill_sale_created_at():
+    return db.session.execute(
+        update(Sale).where(Sale.created_at.is_(None))
+        .values(created_at=func.coalesce(Sale.updated_at, datetime.now()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+# Service to rebuild sales_daily_rollup from the sales table in one transaction
+def rebuild_sales_rollup():
+    started = time.perf_counter()
+    backfill_sale_created_at()
+    day = func.date(Sale.created_at)
+    db.session.execute(delete(SalesDailyRollup))
+    db.session.execute(insert(SalesDailyRollup).from_select(
+        ['barbershop_id', 'day', *_ROLLUP_TOTALS, 'updated_at'],
+        select(Sale.barbershop_id, day, func.count(Sale.id), func.sum(Sale.amount), func.sum(Sale.expense),
+               func.coalesce(func.sum(Sale.profit), 0), func.now())
+        .group_by(Sale.barbershop_id, day)
+    ))
+    rows = db.session.execute(select(func.count()).select_from(SalesDailyRollup)).scalar()
+    db.session.commit()
+    bucket_cache.invalidate()
+    return {'rows': rows, 'seconds': time.perf_counter() - started}
+
+
+@click.command('rebuild-sales-rollup')
+@with_appcontext
+def rebuild_sales_rollup_command():
+    """Recompute sales_daily_rollup from every sale."""
+    result = rebuild_sales_rollup()
+    click.echo(f"Rebuilt {result['rows']} rollup rows in {result['seconds']:.2f}s")
@@ -1,5 +1,18 @@
 from models import Service
 from app import db
+from utils.columnar import ColumnSpec
+from utils.pagination import paginate
+
+# Columns of Service.to_dict(); ?fields= narrows the select to a subset
+SERVICE_COLUMNS = ColumnSpec(Service, [
+    ('id', Service.id),
+    ('name', Service.name),
+    ('price', Service.price),
+    ('photo_url', Service.photo_url),
+    ('barbershop_id', Service.barbershop_id),
+    ('created_at', Service.created_at),
+    ('updated_at', Service.updated_at),
+])
 
 def create_service(name, price, barbershop_id, photo_url=None):
     service = Service(name=name, price=price, barbershop_id=barbershop_id, photo_url=photo_url)
@@ -7,12 +20,17 @@ def create_service(name, price, barbershop_id, photo_url=None):
     db.session.commit()
     return service
 
-def get_all_services():
-    return Service.query.all()
+def get_all_services(page=None, fields=None):
+    spec = SERVICE_COLUMNS.only(fields, page)
+    return spec.fetch(paginate(spec.select(), page, Service.created_at, Service.id))
 
 def get_service_by_id(service_id):
     return Service.query.get(service_id)
 
+def get_service_record(service_id, fields=None):
+    spec = SERVICE_COLUMNS.only(fields)
+    return spec.fetch_one(spec.select().where(Service.id == service_id))
+
 def update_service(service_id, name=None, price=None, photo_url=None):
     service = Service.query.get(service_id)
     if service:
@@ -33,5 +51,11 @@ def delete_service(service_id):
         return True
     return False
 
-def get_services_by_barbershop_id(barbershop_id):
-    return Service.query.filter_by(barbershop_id=barbershop_id).all()
+# Rows a barbershop's service list is built from, for conditional GETs
+def barbershop_services_scopes(barbershop_id):
+    return [(Service, Service.barbershop_id == barbershop_id)]
+
+def get_services_by_barbershop_id(barbershop_id, page=None, fields=None):
+    spec = SERVICE_COLUMNS.only(fields, page)
+    stmt = spec.select().where(Service.barbershop_id == barbershop_id)
+    return spec.fetch(paginate(stmt, page, Service.created_at, Service.id))
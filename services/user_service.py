@@ -1,7 +1,17 @@
 from models import Client, Barber, Admin
 from app import db
+from config import Config
+from sqlalchemy import select, literal, union_all
 from sqlalchemy.exc import SQLAlchemyError
 from firebase_admin import auth
+from claims_sync import claims_for_role, enqueue_claims
+from utils.cache import TTLCache
+
+# Tables a Firebase UID can live in, in the order they take precedence
+ROLE_MODELS = {"admin": Admin, "barber": Barber, "client": Client}
+
+# uid -> (role, row id), invalidated whenever a user is created, deleted or changes role
+user_role_cache = TTLCache(maxsize=Config.USER_ROLE_CACHE_SIZE, ttl=Config.USER_ROLE_CACHE_TTL)
 
 # User Services
 
@@ -13,28 +23,39 @@ def create_user(data, role):
     try:
         if role == "admin":
             user = Admin(name=data["name"], email=data["email"], uid=data["uid"])
-            custom_claims = {"admin": True, "barber": False, "client": False}
         elif role == "barber":
             user = Barber(name=data["name"], email=data["email"], uid=data["uid"], barbershop_id=data.get("barbershop_id"))
-            custom_claims = {"admin": False, "barber": True, "client": False}
         elif role == "client":
             user = Client(name=data["name"], email=data["email"], uid=data["uid"])
-            custom_claims = {"admin": False, "barber": False, "client": True}
         else:
             raise ValueError("Invalid role provided")
 
         db.session.add(user)
         db.session.commit()
+        user_role_cache.pop(data["uid"])
 
-        # Set custom claims for the user in Firebase
-        auth.set_custom_user_claims(data["uid"], custom_claims)
+        # Set custom claims for the user in Firebase; sent in the background once the row is committed
+        enqueue_claims(data["uid"], claims_for_role(role))
 
         return user
     except SQLAlchemyError as e:
         db.session.rollback()
         raise ValueError(f"Failed to create user due to database error: {str(e)}")
-    except Exception as e:
-        raise ValueError(f"Failed to set custom claims: {str(e)}")
+
+
+def _lookup_user_role(uid):
+    """
+    Find which table holds a UID with a single UNION ALL query.
+    """
+    lookup = union_all(*[
+        select(literal(role).label("role"), literal(priority).label("priority"), model.id.label("id"))
+        .where(model.uid == uid)
+        for priority, (role, model) in enumerate(ROLE_MODELS.items())
+    ]).subquery()
+    row = db.session.execute(
+        select(lookup.c.role, lookup.c.id).order_by(lookup.c.priority).limit(1)
+    ).first()
+    return (row.role, row.id) if row else None
 
 
 def get_user_by_uid(uid):
@@ -42,19 +63,22 @@ def get_user_by_uid(uid):
     Fetch a user by their Firebase UID.
     """
     try:
-        admin = Admin.query.filter_by(uid=uid).first()
-        if admin:
-            return admin, "admin"
-
-        barber = Barber.query.filter_by(uid=uid).first()
-        if barber:
-            return barber, "barber"
-
-        client = Client.query.filter_by(uid=uid).first()
-        if client:
-            return client, "client"
-
-        return None, None
+        cached = user_role_cache.get(uid)
+        if cached:
+            role, user_id = cached
+            user = db.session.get(ROLE_MODELS[role], user_id)
+            if user:
+                return user, role
+            # The row went away behind the cache's back (e.g. deleted by id)
+            user_role_cache.pop(uid)
+
+        found = _lookup_user_role(uid)
+        if not found:
+            return None, None
+
+        role, user_id = found
+        user_role_cache.set(uid, found)
+        return db.session.get(ROLE_MODELS[role], user_id), role
     except SQLAlchemyError as e:
         raise ValueError(f"Failed to fetch user: {str(e)}")
 
@@ -78,6 +102,8 @@ def update_user_role(uid, new_role):
 
         db.session.add(user)
         db.session.commit()
+        user_role_cache.pop(uid)
+        enqueue_claims(uid, claims_for_role(new_role))
         return user
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -92,6 +118,7 @@ def delete_user(uid):
         # Delete the user from the backend database
         db.session.delete(user)
         db.session.commit()
+        user_role_cache.pop(uid)
 
         # Delete the user from Firebase using Firebase Admin SDK
         auth.delete_user(uid)
@@ -0,0 +1,45 @@
+"""
+The list endpoints issue the same number of SQL statements whatever the
+table sizes: the ColumnSpecs and services/loader_profiles.py must not
+let a per-row query (N+1) back in. Seeds and endpoints are shared with
+benchmarks/bench_list_queries.py.
+"""
+import pytest
+from sqlalchemy import event
+
+from benchmarks.bench_list_queries import ENDPOINTS, build_app, seed
+
+SIZES = (3, 30)
+
+
+@pytest.fixture(scope='module')
+def query_counts():
+    app = build_app()
+    from app import db
+
+    counts = {}
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(1)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            for size in SIZES:
+                seed(db, size)
+                db.session.remove()
+                for endpoint in ENDPOINTS:
+                    statements.clear()
+                    response = app.test_client().get(endpoint)
+                    counts.setdefault(endpoint, []).append((response.status_code, len(statements)))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+            db.session.remove()
+            db.drop_all()
+    return counts
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_query_count_does_not_grow_with_rows(query_counts, endpoint):
+    results = query_counts[endpoint]
+    assert [status for status, _ in results] == [200] * len(SIZES)
+    statements = [count for _, count in results]
+    assert len(set(statements)) == 1, f'{endpoint} issued {statements} statements for {SIZES} rows'
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache where every entry carries its own expiry.
+
+    Entries are evicted least-recently-used first once ``maxsize`` is reached,
+    and lazily dropped when read after they expire. Hit/miss/eviction counters
+    are kept so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+            elif len(self._data) >= self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            self._data[key] = (value, self._clock() + ttl)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def values(self):
+        """Snapshot of the cached values, expired entries included until they are read."""
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+
+class CommitInvalidatedCache(TTLCache):
+    """
+    TTLCache whose entries are dropped when a transaction that changed their
+    source rows commits.
+
+    Writers record what they changed with ``mark(session, keys)``; the marks
+    ride on ``session.info[name]``, are passed to ``invalidate`` once the
+    transaction commits and are forgotten if it rolls back. ``expand`` maps a
+    marked key to the cache keys it affects (by default, itself).
+
+    A value computed while an invalidation ran may predate it, so readers
+    note ``generation`` before computing and store through ``set_current``,
+    which drops the value if an invalidation happened meanwhile.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300, expand=None, clock=time.monotonic):
+        super().__init__(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.name = name
+        self.expand = expand or (lambda key: (key,))
+        self.generation = 0
+        self.invalidations = 0
+        self._generation_lock = threading.Lock()
+        event.listen(Session, 'after_commit', self._after_commit)
+        event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def mark(self, session, keys=None):
+        """Invalidate ``keys`` (everything when None) when ``session`` commits."""
+        if keys is None:
+            session.info[self.name] = None
+            return
+        marks = session.info.setdefault(self.name, set())
+        if marks is not None:
+            marks.update(keys)
+
+    def invalidate(self, keys=None):
+        """Drop the entries affected by ``keys``, or every entry when None."""
+        with self._generation_lock:
+            self.generation += 1
+            self.invalidations += 1
+            if keys is None:
+                self.clear()
+                return
+            for key in keys:
+                for cache_key in self.expand(key):
+                    self.pop(cache_key)
+
+    def set_current(self, generation, key, value, ttl=None):
+        """Store ``value`` unless an invalidation happened since ``generation`` was read."""
+        with self._generation_lock:
+            if generation == self.generation:
+                self.set(key, value, ttl)
+
+    def stats(self):
+        stats = super().stats()
+        stats['invalidations'] = self.invalidations
+        return stats
+
+    def _after_commit(self, session):
+        if self.name not in session.info:
+            return
+        marks = session.info.pop(self.name)
+        if marks is None or marks:
+            self.invalidate(marks)
+
+    def _after_rollback(self, session):
+        session.info.pop(self.name, None)
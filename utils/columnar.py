@@ -0,0 +1,158 @@
+import json
+from flask import Response, request, stream_with_context
+from flask_restx import abort
+from sqlalchemy import DateTime, func, select
+from app import db
+from config import Config
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class ColumnSpec:
+    """
+    Output keys mapped to SQL columns, for serving a list endpoint straight
+    from Core rows instead of hydrating ORM objects and calling to_dict().
+
+    ``columns`` is a list of ``(key, column)`` pairs in output order. Columns
+    from other tables are reached through ``joins``, a list of
+    ``(target, onclause)`` pairs applied as LEFT OUTER JOINs.
+
+    ``nested`` is a list of ``(key, spec, foreign_key)`` triples for embedded
+    one-to-many collections, e.g. a barbershop's services. Each one is loaded
+    with a single extra query per result set, and only when its key is kept.
+    An entry may add ``limit`` and ``order_by`` to embed only the first
+    ``limit`` children of each parent in that order; they are picked with a
+    ROW_NUMBER() window inside the same query.
+    """
+
+    def __init__(self, model, columns, joins=(), nested=()):
+        self.model = model
+        self.columns = list(columns)
+        self.joins = list(joins)
+        self.nested = [(tuple(entry) + (None, ()))[:5] for entry in nested]
+        self.keys = [key for key, _ in self.columns]
+        self.datetime_indexes = [
+            i for i, (_, column) in enumerate(self.columns) if isinstance(column.type, DateTime)
+        ]
+
+    @property
+    def fields(self):
+        return self.keys + [entry[0] for entry in self.nested]
+
+    def only(self, fields, page=None):
+        """
+        A copy restricted to ``fields``, so the SELECT list, the joins and the
+        nested loads shrink with it. ``id`` is always kept, and so is the
+        cursor column when a page was requested. None means every field.
+        """
+        if fields is None:
+            return self
+        keep = {'id', *fields}
+        if page is not None:
+            keep.add(page.created_key)
+        columns = [(key, column) for key, column in self.columns if key in keep]
+        # Computed columns have no table and only read the base model's
+        tables = {getattr(column, 'table', None) for _, column in columns}
+        joins = [(target, onclause) for target, onclause in self.joins
+                 if getattr(target, '__table__', target) in tables]
+        nested = [entry for entry in self.nested if entry[0] in keep]
+        return ColumnSpec(self.model, columns, joins, nested)
+
+    def select(self):
+        stmt = select(*[column.label(key) for key, column in self.columns]).select_from(self.model)
+        for target, onclause in self.joins:
+            stmt = stmt.outerjoin(target, onclause)
+        return stmt
+
+    def to_dicts(self, rows):
+        if not rows:
+            return []
+        # Work column by column so datetimes are formatted in one pass per column
+        columns = [list(column) for column in zip(*rows)]
+        for i in self.datetime_indexes:
+            columns[i] = list(map(_isoformat, columns[i]))
+        keys = self.keys
+        items = [dict(zip(keys, values)) for values in zip(*columns)]
+        if self.nested:
+            self._attach_nested(items)
+        return items
+
+    @staticmethod
+    def _nested_select(spec, foreign_key, ids, limit, order_by):
+        # The foreign key rides along as the last column; to_dicts ignores it
+        if limit is None:
+            return spec.select().add_columns(foreign_key).where(foreign_key.in_(ids)).order_by(spec.model.id)
+        position = func.row_number().over(partition_by=foreign_key, order_by=order_by)
+        ranked = spec.select().add_columns(
+            foreign_key.label('_parent_id'), position.label('_position')
+        ).where(foreign_key.in_(ids)).subquery()
+        return select(*[ranked.c[key] for key in spec.keys], ranked.c._parent_id).where(
+            ranked.c._position <= limit
+        ).order_by(ranked.c._parent_id, ranked.c._position)
+
+    def _attach_nested(self, items):
+        ids = [item['id'] for item in items]
+        for key, spec, foreign_key, limit, order_by in self.nested:
+            rows = db.session.execute(self._nested_select(spec, foreign_key, ids, limit, order_by)).all()
+            children = {parent_id: [] for parent_id in ids}
+            for row, child in zip(rows, spec.to_dicts(rows)):
+                children[row[-1]].append(child)
+            for item in items:
+                item[key] = children[item['id']]
+
+    def fetch(self, stmt=None):
+        rows = db.session.execute(self.select() if stmt is None else stmt).all()
+        return self.to_dicts(rows)
+
+    def fetch_one(self, stmt):
+        items = self.fetch(stmt)
+        return items[0] if items else None
+
+    def stream_json(self, stmt=None, chunk_size=None):
+        """
+        Yield the rows as chunks of one JSON array, fetching ``chunk_size`` rows
+        at a time so memory stays flat however large the table is.
+        """
+        stmt = self.select() if stmt is None else stmt
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size or Config.STREAM_CHUNK_SIZE))
+        yield '['
+        separator = ''
+        for rows in result.partitions():
+            yield separator + ','.join(map(_dumps, self.to_dicts(rows)))
+            separator = ','
+        yield ']'
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def json_response(data, status=200):
+    """Serialize already JSON-ready data directly, bypassing flask-restx marshalling."""
+    return Response(_dumps(data), status=status, mimetype='application/json')
+
+
+def get_fields(spec):
+    """
+    The field names requested through ?fields=a,b,c, or None when the client
+    wants the full representation. Unknown names are a 400.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(spec.fields))
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def streaming_json_response(chunks, status=200):
+    """Send a JSON body produced chunk by chunk, e.g. by ColumnSpec.stream_json()."""
+    return Response(stream_with_context(chunks), status=status, mimetype='application/json')
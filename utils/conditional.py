@@ -0,0 +1,61 @@
+import hashlib
+from datetime import timezone
+from flask import Response, request
+from sqlalchemy import func, select
+from app import db
+
+
+def probe(scopes):
+    """
+    Row count and max(updated_at) of every ``(model, *criteria)`` scope, read
+    in a single round trip. Returns the counts and the newest updated_at.
+    """
+    columns = []
+    for model, *criteria in scopes:
+        columns.append(select(func.count()).select_from(model).where(*criteria).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).where(*criteria).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    last_modified = max((stamp for stamp in row[1::2] if stamp is not None), default=None)
+    return tuple(row[0::2]), last_modified
+
+
+def _http_date(value):
+    # updated_at is stored as naive local time; HTTP dates are whole UTC seconds
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_response(scopes, build):
+    """
+    Serve a GET that honours If-None-Match / If-Modified-Since.
+
+    The validators come from a cheap ``probe`` of the tables behind the
+    representation, so a matching client gets a 304 without ``build`` ever
+    running. Otherwise ``build()`` produces the response and, when it is a
+    200, the ETag and Last-Modified headers are attached to it.
+    """
+    counts, newest = probe(scopes)
+    # The query string is part of the representation (?fields=, ?cursor=, ...). The
+    # ETag takes the full-precision stamp, so writes within one second still change it
+    watermark = f"{request.full_path}|{counts}|{newest.isoformat() if newest else ''}"
+    etag = hashlib.sha1(watermark.encode('utf-8')).hexdigest()
+    last_modified = _http_date(newest) if newest is not None else None
+
+    if _not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = build()
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
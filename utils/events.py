@@ -0,0 +1,288 @@
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from flask import Response, request
+from config import Config
+from utils.threads import ThreadStarter
+
+# Change feed behind the server-sent-event endpoints. Writers publish events
+# on channels such as "barber:7" through a transport; the transport hands
+# them to the EventBroker of every worker process, which fans them out to the
+# SSE streams subscribed to those channels.
+
+Event = namedtuple('Event', ['id', 'type', 'channels', 'data'])
+
+
+class Subscription:
+    """One SSE stream: a bounded queue of events for a set of channels."""
+
+    def __init__(self, channels, queue_size):
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(queue_size)
+        # Set when the client fell too far behind; its stream then ends and
+        # the browser reconnects with Last-Event-ID to catch up from the backlog
+        self.overflowed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """
+    In-process fan-out of events to subscriptions, by channel.
+
+    The last ``backlog`` events are kept so a reconnecting stream can be
+    replayed everything it missed after its Last-Event-ID.
+    """
+
+    def __init__(self, queue_size=100, backlog=1000):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # channel -> set of Subscription
+        self._backlog = deque(maxlen=backlog)
+        self.dispatched = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._backlog:
+                    if event.id > last_event_id and subscription.channels & event.channels:
+                        self._deliver(subscription, event)
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def dispatch(self, event):
+        with self._lock:
+            self.dispatched += 1
+            self._backlog.append(event)
+            targets = set()
+            for channel in event.channels:
+                targets.update(self._subscriptions.get(channel, ()))
+            for subscription in targets:
+                self._deliver(subscription, event)
+
+    def _deliver(self, subscription, event):
+        if subscription.overflowed:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+            self.delivered += 1
+        except queue.Full:
+            subscription.overflowed = True
+            self.overflows += 1
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscriptions.values() for s in subscribers})
+
+    def stats(self):
+        return {
+            'subscribers': self.subscriber_count,
+            'dispatched': self.dispatched,
+            'delivered': self.delivered,
+            'overflows': self.overflows
+        }
+
+
+class LocalTransport:
+    """Events stay inside this process; enough for a single worker."""
+
+    local_only = True
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._dispatch = None
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+
+    def publish(self, event_type, channels, data):
+        self._dispatch(Event(next(self._ids), event_type, frozenset(channels), data))
+
+    def stop(self):
+        pass
+
+
+class SQLiteChangeLog:
+    """
+    Cross-worker transport: events are appended to a shared SQLite file and
+    every worker tails it, so a change made by one worker reaches the SSE
+    streams of all of them within ``poll_interval`` seconds. The log's row
+    ids are the event ids, so they are the same in every worker.
+    """
+
+    local_only = False
+
+    def __init__(self, path, poll_interval=0.5, retention=3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._dispatch = None
+        self._thread = None
+        self._starter = ThreadStarter()
+        self._stopping = threading.Event()
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'type TEXT NOT NULL, channels TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+        self._starter.ensure(self._start_tail)
+
+    def publish(self, event_type, channels, data):
+        self._starter.ensure(self._start_tail)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT INTO events (type, channels, data, created_at) VALUES (?, ?, ?, ?)',
+                    (event_type, json.dumps(sorted(channels)), json.dumps(data, separators=(',', ':')), time.time())
+                )
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval * 4)
+            self._thread = None
+        self._starter.reset()
+
+    def _start_tail(self):
+        # Each worker process tails the log itself (see ThreadStarter)
+        connection = self._connect()
+        # Read before returning to publish(), so this worker's own next event is not skipped
+        last_id = connection.execute('SELECT coalesce(max(id), 0) FROM events').fetchone()[0]
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._tail, args=(connection, last_id),
+                                        name='event-log-tail', daemon=True)
+        self._thread.start()
+
+    def _tail(self, connection, last_id):
+        last_trim = 0.0
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                rows = connection.execute(
+                    'SELECT id, type, channels, data FROM events WHERE id > ? ORDER BY id', (last_id,)
+                ).fetchall()
+                for event_id, event_type, channels, data in rows:
+                    self._dispatch(Event(event_id, event_type, frozenset(json.loads(channels)), json.loads(data)))
+                    last_id = event_id
+                now = time.time()
+                if now - last_trim > self.retention / 10:
+                    with connection:
+                        connection.execute('DELETE FROM events WHERE created_at < ?', (now - self.retention,))
+                    last_trim = now
+            except sqlite3.Error:
+                logging.exception("Reading the event log failed")
+        connection.close()
+
+
+_broker = None
+_transport = None
+_lock = threading.Lock()
+
+
+def _build_transport():
+    if Config.EVENTS_TRANSPORT == 'sqlite':
+        return SQLiteChangeLog(Config.EVENTS_LOG_PATH, poll_interval=Config.EVENTS_POLL_INTERVAL,
+                               retention=Config.EVENTS_LOG_RETENTION)
+    return LocalTransport()
+
+
+def get_broker():
+    global _broker, _transport
+    if _broker is None:
+        with _lock:
+            if _broker is None:
+                broker = EventBroker(queue_size=Config.EVENTS_QUEUE_SIZE, backlog=Config.EVENTS_BACKLOG)
+                _transport = _build_transport()
+                _transport.start(broker.dispatch)
+                atexit.register(_transport.stop)
+                _broker = broker
+    return _broker
+
+
+def has_listeners():
+    """Whether a published event can reach anyone; False lets writers skip building it."""
+    broker = get_broker()
+    return not _transport.local_only or broker.subscriber_count > 0
+
+
+def publish(event_type, channels, data):
+    """Publish an event; a failure is logged and never propagated to the writer."""
+    get_broker()
+    try:
+        _transport.publish(event_type, channels, data)
+    except Exception:
+        logging.exception(f"Publishing {event_type} event to {sorted(channels)} failed")
+
+
+def sse_stream(channels, last_event_id=None, heartbeat=None):
+    """
+    Generator of text/event-stream chunks for ``channels``. A comment line is
+    sent every ``heartbeat`` seconds so proxies keep the connection open.
+    """
+    heartbeat = Config.EVENTS_HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    broker = get_broker()
+    subscription = broker.subscribe(channels, last_event_id)
+    try:
+        yield f"retry: {Config.EVENTS_RETRY_MS}\n\n"
+        while True:
+            event = subscription.get(heartbeat)
+            if event is None:
+                if subscription.overflowed:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps(event.data, separators=(',', ':'))
+            yield f"id: {event.id}\nevent: {event.type}\ndata: {data}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def sse_response(channels):
+    """
+    A text/event-stream Response for ``channels``, resuming after the
+    Last-Event-ID header (or ?last_event_id=) when the client sends one.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    response = Response(sse_stream(channels, last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,4 +1,15 @@
+from datetime import date
+
+
 def format_datetime(dt):
     if dt:
         return dt.strftime('%Y-%m-%d %H:%M:%S')
-    return None
\ No newline at end of file
+    return None
+
+
+def parse_day(value, name):
+    """A YYYY-MM-DD query parameter as a date, None when empty; ValueError names the parameter."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        raise ValueError(f"'{name}' must be formatted as YYYY-MM-DD.")
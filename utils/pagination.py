@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from flask_restx import abort
+from sqlalchemy import and_, or_
+from config import Config
+
+
+def encode_cursor(created_at, row_id):
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class Page:
+    """
+    One keyset page over (created_at, id): ``limit`` rows strictly after the
+    position encoded in the opaque cursor.
+    """
+
+    def __init__(self, limit, after=None, created_key='created_at'):
+        self.limit = limit
+        self.after = after
+        self.created_key = created_key
+
+    def apply(self, query, created_column, id_column):
+        """Filter and limit ``query``, which must already be ordered by (created_column, id_column)."""
+        if self.after is not None:
+            created_at, row_id = self.after
+            query = query.filter(or_(
+                created_column > created_at,
+                and_(created_column == created_at, id_column > row_id)
+            ))
+        # One extra row tells us whether there is a next page
+        return query.limit(self.limit + 1)
+
+    def envelope(self, items):
+        has_more = len(items) > self.limit
+        items = items[:self.limit]
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor(last[self.created_key], last['id'])
+        return {'items': items, 'next_cursor': next_cursor}
+
+
+def get_page(created_key='created_at'):
+    """
+    The page requested through ?limit= and/or ?cursor=, or None when the
+    client asked for the whole (legacy, unpaginated) list.
+    """
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+
+    limit = request.args.get('limit', Config.DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, Config.MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        abort(400, str(e))
+    return Page(limit, after, created_key)
+
+
+def paginate(query, page, created_column, id_column):
+    """Order a Query or Select by (created_column, id_column) and restrict it to ``page``; a None page leaves it untouched."""
+    if page is None:
+        return query
+    return page.apply(query.order_by(created_column, id_column), created_column, id_column)
+
+
+def page_response(items, page):
+    """Wrap serialized items as {items, next_cursor} when a page was requested."""
+    if page is None:
+        return items
+    return page.envelope(items)
@@ -0,0 +1,106 @@
+import sys
+from collections import namedtuple
+from functools import wraps
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config import Config
+from models import Barbershop, Barber, Service, Review
+from utils.cache import CommitInvalidatedCache
+from utils.columnar import json_response
+
+# Rows the cached catalog payloads are built from. Reviews are embedded in
+# the barber lists, so they count too.
+CATALOG_MODELS = (Barbershop, Barber, Service, Review)
+
+# Headers replayed on a hit so conditional GETs keep working
+_REPLAYED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'mimetype', 'headers'])
+
+# Dropped whole when a transaction that touched a catalog row commits
+response_cache = CommitInvalidatedCache('catalog_changed', maxsize=Config.RESPONSE_CACHE_SIZE,
+                                        ttl=Config.RESPONSE_CACHE_TTL)
+
+
+def invalidate():
+    """Drop every cached catalog response."""
+    response_cache.invalidate()
+
+
+def _cache_key():
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def _replay(entry):
+    response = Response(entry.body, mimetype=entry.mimetype)
+    for name, value in entry.headers:
+        response.headers[name] = value
+    response.headers['X-Cache'] = 'HIT'
+    return response.make_conditional(request)
+
+
+def cached_response(view):
+    """
+    Cache a catalog GET by path and query string until a catalog row changes.
+
+    Only 200 responses are stored. A response computed while a catalog commit
+    landed is not stored, since it may predate the change.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = _cache_key()
+        entry = response_cache.get(key)
+        if entry is not None:
+            return _replay(entry)
+
+        generation = response_cache.generation
+        response = view(*args, **kwargs)
+        if not isinstance(response, Response):
+            data, status = response if isinstance(response, tuple) else (response, 200)
+            if status != 200:
+                return response
+            response = json_response(data)
+        if response.status_code != 200 or response.is_streamed:
+            return response
+
+        entry = CachedResponse(
+            response.get_data(),
+            response.mimetype,
+            [(name, response.headers[name]) for name in _REPLAYED_HEADERS if name in response.headers]
+        )
+        response_cache.set_current(generation, key, entry)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+def get_response_cache_stats():
+    stats = response_cache.stats()
+    stats['bytes'] = sum(
+        sys.getsizeof(entry.body) + sum(sys.getsizeof(name) + sys.getsizeof(value) for name, value in entry.headers)
+        for entry in response_cache.values()
+    )
+    return stats
+
+
+# Invalidation: flushes and bulk writes that touch a catalog row mark the
+# session; response_cache drops everything once that transaction commits.
+
+def _touches_catalog(objects):
+    return any(isinstance(obj, CATALOG_MODELS) for obj in objects)
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_catalog_writes(session, flush_context):
+    if _touches_catalog(session.new) or _touches_catalog(session.dirty) or _touches_catalog(session.deleted):
+        response_cache.mark(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_bulk_catalog_writes(orm_execute_state):
+    # query.update() / query.delete() never go through a flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, CATALOG_MODELS):
+            response_cache.mark(orm_execute_state.session)
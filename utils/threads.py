@@ -0,0 +1,28 @@
+import os
+import threading
+
+
+class ThreadStarter:
+    """
+    Starts a component's background threads once per process.
+
+    Threads do not survive a fork, so a (gunicorn) worker forked from a
+    process that had already started them starts its own on first use.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure(self, start):
+        """Call ``start()`` unless it already ran in this process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                start()
+                self._pid = os.getpid()
+
+    def reset(self):
+        """Forget the start, so the next ensure() starts the threads again."""
+        self._pid = None